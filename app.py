@@ -1,13 +1,19 @@
 import streamlit as st
-import matplotlib.pyplot as plt
 import matplotlib as mpl
 import pandas as pd
-import numpy as np
-import FinanceDataReader as fdr
-from datetime import date, timedelta
+from datetime import timedelta
 import platform
 from matplotlib import font_manager, rc
 
+import pipeline
+import telemetry
+from datasource import FDR_RATE_PER_SEC, default_source
+from charts import render_chart, chart_spec
+from prefetch import Prefetcher, DEFAULT_LOOKBACK_DAYS
+from scanner import scan_market, buy_signals_this_week
+from search import TickerIndex
+from store import OHLCVStore, market_today
+
 # --------------------------------------------------------------------------
 # 🖥️ 기본 설정 및 캐싱 (모바일 최적화)
 # --------------------------------------------------------------------------
@@ -39,127 +45,76 @@ set_font()
 # KRX 종목 리스트 불러오기 (캐싱)
 @st.cache_data
 def get_krx_list():
-    return fdr.StockListing('KRX')
+    telemetry.miss('get_krx_list')  # 본문은 캐시 미스일 때만 실행된다
+    with telemetry.span('source.listing'):
+        return default_source().listing('KRX')
+
+
+# 종목 검색 인덱스 (종목 리스트당 한 번만 생성)
+@st.cache_resource
+def get_ticker_index():
+    telemetry.miss('get_ticker_index')
+    return TickerIndex(telemetry.cached('get_krx_list', get_krx_list))
+
+
+# 로컬 일봉 저장소 (프로세스당 하나)
+@st.cache_resource
+def get_store():
+    return OHLCVStore()
+
+
+# 인기/관심 종목 캐시 예열 (프로세스당 한 번 시작, 백그라운드 스레드에서 실행)
+@st.cache_resource
+def start_prefetcher():
+    return Prefetcher(get_ticker_index(), loader=get_store()).start()
+
+
+start_prefetcher()
+
+
+# 전체 시장 스캔 결과 (1시간 캐싱). 당일 봉은 새로 받은 종목 목록의 시세 스냅샷으로 만든다
+@st.cache_data(ttl=3600, max_entries=4, show_spinner=False)
+def get_market_scan(scan_date):
+    telemetry.miss('get_market_scan')
+    with telemetry.span('source.listing'):
+        listing = default_source().listing('KRX')
+    with telemetry.span('scan_market'):
+        return scan_market(listing, end=scan_date, loader=get_store())
 
 
 # --------------------------------------------------------------------------
 # 📈 메인 분석 함수 (그래프, 결과 출력 부분 수정)
 # --------------------------------------------------------------------------
-def run_analysis(stock_name, start_date):
-    krx_list = get_krx_list()
-
+def run_analysis(stock_name, start_date, interactive=False):
     # 1) 종목코드 찾기
-    try:
-        stock_code = krx_list[krx_list['Name'] == stock_name]['Code'].iloc[0]
-    except IndexError:
+    stock_code = telemetry.cached('get_ticker_index', get_ticker_index).code(stock_name)
+    if stock_code is None:
         st.error("해당 종목을 찾을 수 없습니다. 종목명을 정확히 입력해주세요.")
         return
 
     # 2) 데이터 불러오기 및 전처리
-    end_date = date.today()
-    df = fdr.DataReader(stock_code, start=start_date, end=end_date)
-    if df.empty:
+    end_date = market_today()
+    # 4) 주간 데이터 및 지표 계산 (신호 + Fear & Greed, 단계별 캐싱)
+    weekly = pipeline.weekly_indicators(stock_code, start_date, end_date, loader=get_store())
+    if weekly.empty:
         st.error("해당 기간의 데이터가 없습니다. 시작일을 확인해주세요.")
         return
-    df = df[['Open', 'High', 'Low', 'Close', 'Volume']].dropna()
-    df = df[df[['Open', 'High', 'Low', 'Close']].ne(0).all(axis=1)]
-
-    # 4) 주간 데이터 및 지표 계산 (기존과 동일)
-    weekly = df.resample('W-FRI').agg({
-        'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'
-    }).dropna()
-    weekly['Prev_High'] = weekly['High'].shift(1)
-    weekly['Prev_Low'] = weekly['Low'].shift(1)
-    weekly['MA10'] = weekly['Close'].rolling(window=10).mean()
-    mf_multiplier = ((weekly['Close'] - weekly['Low']) - (weekly['High'] - weekly['Close'])) / (
-                weekly['High'] - weekly['Low'])
-    mf_volume = mf_multiplier * weekly['Volume']
-    weekly['CMF'] = mf_volume.rolling(window=4).sum() / weekly['Volume'].rolling(window=4).sum()
-    weekly['BuySignal'] = 0
-    weekly['SellSignal'] = 0
-    weekly.loc[(weekly['High'] > weekly['Prev_High']) & (weekly['Close'] > weekly['MA10']) & (
-                weekly['CMF'] > 0), 'BuySignal'] = 1
-    weekly.loc[(weekly['Low'] < weekly['Prev_Low']) & (weekly['Close'] < weekly['MA10']) & (
-                weekly['CMF'] < 0), 'SellSignal'] = 1
-
-    # ... (백테스트, Fear & Greed 계산 로직은 기존과 동일하게 유지)
-    # 7) 백테스트 로직 (생략 - 기존 코드와 동일)
-    position = False;
-    entries, exits = [], [];
-    entry_date_temp = None
-    for i in range(1, len(weekly)):
-        row = weekly.iloc[i]
-        if not position and row['BuySignal'] == 1:
-            entry_date_temp = row.name;
-            entry_price = row['Open'];
-            position = True
-        elif position and row['SellSignal'] == 1:
-            exit_date = row.name;
-            exit_price = row['Close'];
-            entries.append((entry_date_temp, entry_price));
-            exits.append((exit_date, exit_price));
-            position = False
-    if position and entry_date_temp:
-        last_row = weekly.iloc[-1];
-        entries.append((entry_date_temp, entry_price));
-        exits.append((last_row.name, last_row['Close']))
-    bt_df = pd.DataFrame()
-    if entries:
-        bt_df = pd.DataFrame(entries, columns=['EntryDate', 'EntryPrice']);
-        bt_df['ExitDate'], bt_df['ExitPrice'] = zip(*exits);
-        bt_df['Return'] = (bt_df['ExitPrice'] - bt_df['EntryPrice']) / bt_df['EntryPrice'];
-        bt_df['CumulativeReturn'] = (1 + bt_df['Return']).cumprod()
-
-    # 8) Fear & Greed 지수 계산 (생략 - 기존 코드와 동일)
-    weekly['Momentum5'] = (np.log(weekly['Close']) - np.log(weekly['Close'].shift(5))) * 100
-    rolling_low = weekly['Close'].rolling(window=52, min_periods=1).min();
-    rolling_high = weekly['Close'].rolling(window=52, min_periods=1).max()
-    weekly['Position52W'] = ((weekly['Close'] - rolling_low) / (rolling_high - rolling_low)).clip(0, 1)
-    # ... (나머지 계산은 기존 코드와 동일)
-    recent_vol_avg = weekly['Volume'].rolling(window=5, min_periods=1).mean();
-    past_vol_avg = weekly['Volume'].rolling(window=20, min_periods=1).mean()
-    weekly['VolumeSurge'] = (recent_vol_avg / past_vol_avg).clip(0, 3)
-    weekly_return = weekly['Close'].pct_change();
-    recent_vol = weekly_return.rolling(window=5, min_periods=1).std();
-    past_vol = weekly_return.rolling(window=20, min_periods=1).std()
-    weekly['VolatilitySpike'] = (recent_vol / past_vol).clip(0, 3)
-    momentum_score = (weekly['Momentum5'].rolling(window=7, min_periods=1).mean() / 10).clip(-1, 1.5)
-    position_score = (2 * weekly['Position52W'].rolling(window=7, min_periods=1).mean() - 1).clip(-1, 1.5)
-    volume_score = (weekly['VolumeSurge'].rolling(window=10, min_periods=1).mean() - 1).clip(-0.5, 1.2)
-    volatility_score = -(weekly['VolatilitySpike'].rolling(window=10, min_periods=1).mean() - 1).clip(-0.5, 1.2)
-    weekly['FearGreedScore'] = (
-                0.45 * momentum_score + 0.45 * position_score + 0.05 * volume_score + 0.05 * volatility_score)
+
+    # 7) 백테스트 (벡터화 엔진, 기존 루프와 동일한 결과)
+    bt_df, summary, actual_sell_signal = pipeline.backtest(stock_code, start_date, end_date, revised=False,
+                                                           loader=get_store())
 
     # 9) 그래프 그리기
     st.subheader(f"📈 {stock_name} ({stock_code}) 분석 차트")
-    # 그래프 크기를 모바일에 맞게 수정 (10, 7)
-    fig, ax1 = plt.subplots(figsize=(10, 7))
-    # ... (그래프 그리는 나머지 코드는 기존과 동일)
-    ax1.plot(weekly.index, weekly['Close'], label='종가', color='black');
-    ax1.plot(weekly.index, weekly['MA10'], label='MA10', linestyle='--', color='gray');
-    ax1.scatter(weekly[weekly['BuySignal'] == 1].index, weekly[weekly['BuySignal'] == 1]['Close'], color='lightcoral',
-                marker='^', s=70, alpha=0.5, label='잠재 매수');
-    if not bt_df.empty:
-        ax1.scatter(bt_df['EntryDate'] + pd.Timedelta(days=1), bt_df['EntryPrice'], color='red', marker='^', s=100,
-                    label='실제 매수')
-    weekly['ActualSellSignal'] = 0;
-    position = False
-    for i in range(1, len(weekly)):
-        if not position and weekly.iloc[i]['BuySignal'] == 1:
-            position = True
-        elif position and weekly.iloc[i]['SellSignal'] == 1:
-            weekly.loc[weekly.index[i], 'ActualSellSignal'] = 1; position = False
-    ax1.scatter(weekly[weekly['ActualSellSignal'] == 1].index, weekly[weekly['ActualSellSignal'] == 1]['Close'],
-                color='blue', marker='v', s=100, label='실제 매도')
-    ax1.set_ylabel('종가');
-    ax1.grid(True)
-    ax2 = ax1.twinx()
-    ax2.plot(weekly.index, weekly['FearGreedScore'], label='F&G 지수', color='darkorange')
-    ax2.axhline(0.5, color='r', linestyle='--', linewidth=0.8);
-    ax2.axhline(-0.5, color='g', linestyle='--', linewidth=0.8)
-    ax2.set_ylabel('Fear & Greed 지수', color='darkorange')
-    fig.legend(loc='upper center', bbox_to_anchor=(0.5, 0.05), fancybox=True, shadow=True, ncol=5)  # 범례 위치 하단으로
-    st.pyplot(fig)
+    weekly['ActualSellSignal'] = actual_sell_signal
+    with telemetry.span('chart'):
+        if interactive:
+            # 브라우저에서 그리는 경량 차트
+            st.vega_lite_chart(chart_spec(weekly, bt_df, entry_shift_days=1), use_container_width=True)
+        else:
+            # 그래프 크기를 모바일에 맞게 수정 (10, 7), 같은 데이터면 캐시된 이미지 재사용
+            st.image(render_chart(weekly, bt_df, entry_shift_days=1, fg_guides=True, figsize=(10, 7)),
+                     use_container_width=True)
 
     # 10) 백테스트 결과 출력
     st.subheader("📊 백테스트 결과 요약")
@@ -168,15 +123,10 @@ def run_analysis(stock_name, start_date):
         col1, col2 = st.columns(2)
         col3, col4 = st.columns(2)
 
-        total_trades = len(bt_df)
-        avg_return = bt_df['Return'].mean()
-        cum_return = bt_df['CumulativeReturn'].iloc[-1] - 1
-        win_rate = (bt_df['Return'] > 0).mean()
-
-        col1.metric("총 트레이드 수", f"{total_trades} 회")
-        col2.metric("승률", f"{win_rate:.2%}")
-        col3.metric("평균 수익률", f"{avg_return:.2%}")
-        col4.metric("누적 수익률", f"{cum_return:.2%}")
+        col1.metric("총 트레이드 수", f"{summary['total_trades']} 회")
+        col2.metric("승률", f"{summary['win_rate']:.2%}")
+        col3.metric("평균 수익률", f"{summary['avg_return']:.2%}")
+        col4.metric("누적 수익률", f"{summary['cum_return']:.2%}")
 
         # 상세 내역은 펼치기/접기 메뉴 안에 표시
         with st.expander("상세 거래 내역 보기"):
@@ -187,6 +137,24 @@ def run_analysis(stock_name, start_date):
         st.warning("분석 기간 동안 트레이드가 발생하지 않았습니다.")
 
 
+# --------------------------------------------------------------------------
+# 🐞 디버그 패널 (단계별 시간 / 캐시 적중 / 메모리)
+# --------------------------------------------------------------------------
+def show_debug_panel(record):
+    info = record.to_dict()
+    with st.expander("🐞 디버그: 단계별 소요 시간", expanded=True):
+        col1, col2, col3 = st.columns(3)
+        col1.metric("전체 시간", f"{info['total_ms']:,.0f} ms")
+        col2.metric("최대 메모리", f"{info['peak_mem_kb']:,} KB" if info['peak_mem_kb'] is not None else "-")
+        col3.metric("최대 RSS (이번 실행)", f"{info['peak_rss_kb'] / 1024:,.1f} MB" if info['peak_rss_kb'] is not None
+                    else f"{info['max_rss_mb']:,.1f} MB (프로세스)")
+        if info['spans']:
+            spans = pd.DataFrame(info['spans']).T.sort_values('ms', ascending=False)
+            st.dataframe(spans.style.format({'ms': '{:,.1f}', 'count': '{:.0f}'}), use_container_width=True)
+        if info['counters']:
+            st.dataframe(pd.DataFrame(info['counters']).T, use_container_width=True)
+
+
 # --------------------------------------------------------------------------
 # 🌐 웹사이트 UI 구성 (모바일 최적화)
 # --------------------------------------------------------------------------
@@ -195,20 +163,55 @@ st.caption("모바일 환경에 최적화되었습니다.")
 
 # 사이드바 대신 expander를 사용해 메인 화면에 설정 메뉴 배치
 with st.expander("🔍 분석 설정하기", expanded=True):
-    krx_list = get_krx_list()
-    # 인기 종목을 상단에 배치하여 선택 용이성 증대
-    popular_stocks = ['삼성전자', 'SK하이닉스', 'LG에너지솔루션', '현대차', 'NAVER', '카카오', '삼성바이오로직스']
-    other_stocks = sorted([s for s in krx_list['Name'] if s not in popular_stocks])
-    stock_list = popular_stocks + other_stocks
+    ticker_index = get_ticker_index()
+    # 이름 / 초성 / 종목코드로 목록 좁히기 (인기 종목은 항상 상단)
+    query = st.text_input("종목 검색", placeholder="예: 삼성, ㅅㅅㅈㅈ, 005930")
+    stock_list = ticker_index.search(query, limit=200) if query else ticker_index.options
+    if not stock_list:
+        st.caption("검색 결과가 없습니다.")
 
     stock_name_input = st.selectbox("종목을 선택하세요", stock_list)
-    start_date_input = st.date_input("분석 시작일", date.today() - timedelta(days=3 * 365))
+    start_date_input = st.date_input("분석 시작일", market_today() - timedelta(days=DEFAULT_LOOKBACK_DAYS))
+    interactive_input = st.toggle("⚡ 인터랙티브 차트 (가벼운 브라우저 렌더링)")
+    debug_input = st.toggle("🐞 디버그 패널 (단계별 시간 / 캐시 / 메모리)")
 
     # 분석 버튼을 중앙에 크게 배치
     st.divider()
     if st.button("🚀 분석 실행", use_container_width=True):
         with st.spinner('데이터를 불러오고 분석하는 중입니다...'):
-            run_analysis(stock_name_input, start_date_input)
+            with telemetry.run('run_analysis', trace_memory=debug_input, stock=stock_name_input,
+                               start=start_date_input.isoformat(), interactive=interactive_input) as record:
+                run_analysis(stock_name_input, start_date_input, interactive_input)
+        if debug_input:
+            show_debug_panel(record)
+
+# 전체 시장 스캔 (이번 주 매수 신호 종목)
+with st.expander("📡 전체 시장 스캔"):
+    caption = "KRX 전 종목 중 이번 주에 매수 신호가 발생한 종목을 찾습니다."
+    if FDR_RATE_PER_SEC:
+        # 당일 봉은 시세 스냅샷으로 만들지만, 저장소에 없는 이력은 종목마다 속도 제한에 맞춰 받는다
+        caption += (f" 일봉 저장소가 비어 있는 첫 스캔은 종목마다 이력을 받아 오므로 "
+                    f"약 {len(get_krx_list()) / FDR_RATE_PER_SEC / 60:,.0f}분 걸립니다.")
+    st.caption(caption)
+    if st.button("🔎 스캔 실행", use_container_width=True):
+        with st.spinner('전 종목의 신호를 계산하는 중입니다...'), telemetry.run('market_scan'):
+            scan_df, failed = telemetry.cached('get_market_scan', get_market_scan, market_today())
+            fired = buy_signals_this_week(scan_df)
+        if len(failed) > len(scan_df):
+            # 데이터 소스 장애로 대부분 실패한 결과는 1시간 동안 캐시하지 않고 다음 실행에서 다시 스캔
+            get_market_scan.clear()
+        if failed:
+            st.warning(f"{len(failed):,}개 종목은 데이터를 불러오지 못해 스캔에서 제외했습니다 "
+                       f"(성공 {len(scan_df):,}개).")
+        if scan_df.empty and failed:
+            st.error("종목 데이터를 불러오지 못했습니다. 잠시 후 다시 시도해주세요.")
+        elif fired.empty:
+            st.warning("이번 주 매수 신호가 발생한 종목이 없습니다.")
+        else:
+            st.success(f"{len(fired)}개 종목에서 매수 신호가 발생했습니다.")
+            st.dataframe(fired.style.format({
+                'Close': '{:,.0f}', 'MA10': '{:,.0f}', 'CMF': '{:.3f}', 'FearGreedScore': '{:.2f}'
+            }), use_container_width=True, hide_index=True)
 
 st.divider()
 st.markdown("<sub>Made with Streamlit</sub>", unsafe_allow_html=True)
\ No newline at end of file
@@ -0,0 +1,177 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------------------------------
+# ⚙️ 벡터화 백테스트 엔진
+# --------------------------------------------------------------------------
+# app.py / app2.py 의 행 단위(iloc) 루프와 동일한 상태 머신을 NumPy 배열 연산으로 풀어낸다.
+#  - 미보유 상태에서 매수 신호 → 진입, 보유 상태에서 매도 신호 → 청산
+#  - 같은 봉에 매수/매도 신호가 모두 있으면 상태가 뒤집힌다 (진입 또는 청산)
+#  - 첫 번째 봉(i=0)은 루프와 마찬가지로 무시한다
+# 모든 배열 함수는 마지막 축을 시간 축으로 보므로 (종목 × 주) 또는 (파라미터 × 주)
+# 형태의 2차원 배열도 한 번에 처리할 수 있다.
+
+EMPTY_SUMMARY = {'total_trades': 0, 'avg_return': 0, 'cum_return': 0, 'win_rate': 0}
+
+
+def signal_triggers(buy_signal, sell_signal, revised=False):
+    # 실제 체결에 쓰이는 트리거 배열 (revised=True 이면 전 주 신호로 다음 봉에 체결)
+    buy = np.asarray(buy_signal) == 1
+    sell = np.asarray(sell_signal) == 1
+    if revised:
+        buy = np.concatenate([np.zeros_like(buy[..., :1]), buy[..., :-1]], axis=-1)
+        sell = np.concatenate([np.zeros_like(sell[..., :1]), sell[..., :-1]], axis=-1)
+    buy[..., :1] = False
+    sell[..., :1] = False
+    return buy, sell
+
+
+def resolve_positions(buy, sell):
+    # 각 봉 처리 직후의 보유 여부 (bool 배열, 입력과 같은 shape)
+    buy = np.asarray(buy, dtype=bool)
+    sell = np.asarray(sell, dtype=bool)
+    if buy.shape[-1] == 0:
+        return np.zeros(buy.shape, dtype=bool)
+
+    both = buy & sell
+    only_buy = buy & ~sell
+    decided = only_buy | (sell & ~buy)
+
+    # 마지막으로 상태가 '확정'된 봉(매수 또는 매도 신호만 있던 봉)의 위치
+    steps = np.broadcast_to(np.arange(buy.shape[-1]), buy.shape)
+    last_decided = np.maximum.accumulate(np.where(decided, steps, -1), axis=-1)
+    has_decided = last_decided >= 0
+    anchor = np.where(has_decided, last_decided, 0)
+
+    base = np.take_along_axis(only_buy, anchor, axis=-1) & has_decided
+    cum_both = np.cumsum(both, axis=-1)
+    flips = cum_both - np.where(has_decided, np.take_along_axis(cum_both, anchor, axis=-1), 0)
+    return base ^ (flips % 2 == 1)
+
+
+def trade_points(position):
+    # 진입/청산 봉 마스크와 마지막 봉 강제 청산 여부
+    position = np.asarray(position, dtype=bool)
+    prev = np.concatenate([np.zeros_like(position[..., :1]), position[..., :-1]], axis=-1)
+    entries = position & ~prev
+    exits = ~position & prev
+    forced = position[..., -1] if position.shape[-1] else np.zeros(position.shape[:-1], dtype=bool)
+    return entries, exits, forced
+
+
+def summarize(bt_df):
+    if bt_df.empty:
+        return dict(EMPTY_SUMMARY)
+    return {
+        'total_trades': len(bt_df),
+        'avg_return': bt_df['Return'].mean(),
+        'cum_return': bt_df['CumulativeReturn'].iloc[-1] - 1,
+        'win_rate': (bt_df['Return'] > 0).mean()
+    }
+
+
+# --------------------------------------------------------------------------
+# 📊 단일 종목 백테스트 (기존 함수와 동일한 결과)
+# --------------------------------------------------------------------------
+def run_backtest(weekly_df, revised=False):
+    # 반환: (거래 내역, 요약, ActualSellSignal 시리즈)
+    #  - revised=False: 신호 봉 시가 진입 / 종가 청산 (Look-ahead Bias 존재)
+    #  - revised=True : 전 주 신호로 다음 봉 시가 진입 / 시가 청산, 강제 청산도 매도 표시
+    buy, sell = signal_triggers(weekly_df['BuySignal'].to_numpy(), weekly_df['SellSignal'].to_numpy(), revised)
+    entries, exits, forced = trade_points(resolve_positions(buy, sell))
+
+    actual_sell = exits.astype('int64')
+    entry_idx = np.flatnonzero(entries)
+    exit_idx = np.flatnonzero(exits)
+    if forced:
+        exit_idx = np.append(exit_idx, len(weekly_df) - 1)
+        if revised:
+            actual_sell[-1] = 1
+
+    bt_df = pd.DataFrame()
+    if len(entry_idx):
+        exit_col = 'Open' if revised else 'Close'
+        bt_df = pd.DataFrame({
+            'EntryDate': weekly_df.index[entry_idx],
+            'EntryPrice': weekly_df['Open'].to_numpy()[entry_idx],
+            'ExitDate': weekly_df.index[exit_idx],
+            'ExitPrice': weekly_df[exit_col].to_numpy()[exit_idx],
+        })
+        bt_df['Return'] = (bt_df['ExitPrice'] - bt_df['EntryPrice']) / bt_df['EntryPrice']
+        bt_df['CumulativeReturn'] = (1 + bt_df['Return']).cumprod()
+
+    actual_sell = pd.Series(actual_sell, index=weekly_df.index, name='ActualSellSignal')
+    return bt_df, summarize(bt_df), actual_sell
+
+
+# --------------------------------------------------------------------------
+# 🧮 다중 시나리오 백테스트 (행 = 시나리오, 열 = 주)
+# --------------------------------------------------------------------------
+def batch_trade_returns(position, entry_price, exit_price, lengths=None):
+    # 2차원 보유 배열에서 모든 거래의 (시나리오 번호, 수익률)을 한 번에 계산
+    # entry_price / exit_price 는 (주,) 또는 position 과 같은 shape
+    # lengths: 행마다 길이가 다른 경우 행별 유효 봉 수 (이후 봉은 무시하고 lengths-1 에서 강제 청산)
+    if np.shape(position)[-1] == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0)
+    if lengths is None:
+        entries, exits, forced = trade_points(position)
+        exits = exits.copy()
+        exits[:, -1] |= forced
+    else:
+        last = np.asarray(lengths) - 1
+        valid = np.arange(np.shape(position)[-1]) <= last[:, None]
+        position = np.asarray(position, dtype=bool) & valid
+        entries, exits, _ = trade_points(position)
+        exits &= valid
+        exits[np.arange(len(last)), last] |= position[np.arange(len(last)), last]
+    entry_rows, entry_cols = np.nonzero(entries)
+    exit_rows, exit_cols = np.nonzero(exits)
+    if np.ndim(entry_price) == 1:
+        entry_px, exit_px = entry_price[entry_cols], exit_price[exit_cols]
+    else:
+        entry_px, exit_px = entry_price[entry_rows, entry_cols], exit_price[exit_rows, exit_cols]
+    return entry_rows, (exit_px - entry_px) / entry_px
+
+
+def batch_summary(rows, returns, n_rows):
+    # summarize() 와 같은 지표를 시나리오별 배열로 반환
+    total_trades = np.bincount(rows, minlength=n_rows)
+    traded = total_trades > 0
+    avg_return = np.zeros(n_rows)
+    win_rate = np.zeros(n_rows)
+    cum_return = np.zeros(n_rows)
+    avg_return[traded] = np.bincount(rows, weights=returns, minlength=n_rows)[traded] / total_trades[traded]
+    win_rate[traded] = np.bincount(rows, weights=returns > 0, minlength=n_rows)[traded] / total_trades[traded]
+    if len(rows):
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        cum_return[rows[starts]] = np.multiply.reduceat(1 + returns, starts) - 1
+    return {'total_trades': total_trades, 'avg_return': avg_return, 'cum_return': cum_return, 'win_rate': win_rate}
+
+
+# --------------------------------------------------------------------------
+# 🧵 시나리오 묶음 병렬 평가 (walkforward / optimizer 공용)
+# --------------------------------------------------------------------------
+# 공통 배열(ctx)은 작업자마다 initializer 로 한 번만 넘기고, 묶음마다 인덱스만 보낸다.
+_WORKER_TASK = None
+
+
+def _init_worker(func, ctx):
+    global _WORKER_TASK
+    _WORKER_TASK = (func, ctx)
+
+
+def _run_in_worker(args):
+    func, ctx = _WORKER_TASK
+    return func(ctx, *args)
+
+
+def evaluate_chunks(func, ctx, chunks, workers=None):
+    # [func(ctx, *chunk) for chunk in chunks] — func 은 모듈 최상위 함수여야 한다 (pickle)
+    workers = workers or os.cpu_count()
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(func, ctx)) as pool:
+            return list(pool.map(_run_in_worker, chunks))
+    return [func(ctx, *chunk) for chunk in chunks]
@@ -0,0 +1,286 @@
+import argparse
+import glob
+import json
+import os
+import sys
+from datetime import date, timedelta
+
+import pandas as pd
+
+from backtest import run_backtest
+from datasource import FETCH_WORKERS, default_source
+from indicators import compute_weekly
+from scanner import fetched_chunks, map_chunks
+from store import OHLCVStore, market_today
+
+# --------------------------------------------------------------------------
+# 🗂️ 헤드리스 배치 분석 (Streamlit 없이 cron / 배치 작업용)
+# --------------------------------------------------------------------------
+# 사용법 (저장소 루트에서):
+#   python batch.py --tickers 005930 000660 --start 2020-01-01 --out result.csv
+#   python batch.py --all --workers 8 --out result.parquet        # KRX 전 종목
+# 종목마다 주간 신호 + F&G 지수 + 두 가지 백테스트(기존/현실) 요약을 한 행으로 만들어
+# 생성기로 흘려 보내며 바로 파일에 쓴다. 다운로드는 이 프로세스의 ConcurrentFetcher 가
+# (--fetch-workers 스레드, 소스 하나의 속도 제한) 맡고 계산만 프로세스 풀로 보낸다.
+# 동시에 처리 중인 종목 수를 제한하므로 종목 수와 무관하게 메모리 사용량이 일정하다.
+#  - CSV: 한 파일에 행 단위로 이어 쓰기
+#  - Parquet: 출력 경로를 디렉터리로 보고 flush 단위마다 part 파일 추가 (pyarrow 필요)
+# 중단 후 같은 명령을 다시 실행하면 이미 기록된 종목은 건너뛰고 이어서 처리한다.
+# 실행 조건(start / end / 데이터 소스)은 출력 옆의 실행 정보 파일에 남겨 두고, 이어 쓸 때
+# 조건이 다르면 섞인 결과가 생기지 않도록 중단한다 (--end 를 생략하면 오늘 날짜이므로
+# 다음 날 이어 쓰려면 --end 를 명시한다).
+DEFAULT_LOOKBACK_DAYS = 3 * 365
+FLUSH_ROWS = 50  # Parquet part 파일 하나에 담을 행 수 (CSV 는 행마다 기록)
+NO_DATA = 'no data'
+VARIANTS = {'orig': False, 'rev': True}
+# part 파일마다 스키마가 달라지지 않도록 (예: 전부 빈 Name 컬럼) 타입을 고정한다
+RESULT_DTYPES = {
+    'Code': 'string', 'Name': 'string', 'Market': 'string', 'Date': 'datetime64[ns]',
+    'Close': 'float64', 'MA10': 'float64', 'CMF': 'float64', 'BuySignal': 'Int64', 'SellSignal': 'Int64',
+    'FearGreedScore': 'float64', 'Weeks': 'Int64', 'Error': 'string',
+    **{f'{prefix}_{key}': dtype for prefix in VARIANTS for key, dtype in (
+        ('total_trades', 'Int64'), ('avg_return', 'float64'), ('cum_return', 'float64'), ('win_rate', 'float64'))},
+}
+RESULT_COLUMNS = list(RESULT_DTYPES)
+
+
+def analyze_frame(code, df):
+    # 종목 하나의 결과 행. 데이터가 없으면 Error='no data' 로 기록하고,
+    # 다운로드(df 가 예외)/계산 오류는 Error 에 예외를 담아 돌려준다 (파일에는 쓰지 않아 다음 실행에서 재시도)
+    row = {'Code': code}
+    if isinstance(df, Exception):
+        row['Error'] = repr(df)
+        return row
+    try:
+        weekly = compute_weekly(df) if df is not None and not df.empty else pd.DataFrame()
+        if weekly.empty:
+            row['Error'] = NO_DATA
+            return row
+        last = weekly.iloc[-1]
+        row.update({
+            'Date': weekly.index[-1],
+            'Close': last['Close'],
+            'MA10': last['MA10'],
+            'CMF': last['CMF'],
+            'BuySignal': int(last['BuySignal']),
+            'SellSignal': int(last['SellSignal']),
+            'FearGreedScore': last['FearGreedScore'],
+            'Weeks': len(weekly),
+        })
+        for prefix, revised in VARIANTS.items():
+            summary = run_backtest(weekly, revised)[1]
+            row.update({f'{prefix}_{key}': value for key, value in summary.items()})
+    except Exception as exc:
+        row['Error'] = repr(exc)
+    return row
+
+
+def _analyze_chunk(items):
+    return [analyze_frame(code, df) for code, df in items]
+
+
+def iter_results(codes, start, end, loader=None, workers=None, chunk_size=8, fetch_workers=FETCH_WORKERS):
+    # 완료되는 순서대로 결과 행을 내보내는 생성기.
+    # 진행 중인 다운로드와 프로세스 풀에 제출한 묶음 수를 모두 제한해 결과가 쌓이지 않게 한다.
+    chunks = fetched_chunks(codes, start, end, loader, chunk_size, fetch_workers)
+    for rows in map_chunks(_analyze_chunk, chunks, workers):
+        yield from rows
+
+
+# --------------------------------------------------------------------------
+# 💾 출력 (이어 쓰기 + 재시작 지점 확인)
+# --------------------------------------------------------------------------
+def _is_parquet(path):
+    return path.endswith('.parquet')
+
+
+def _require_parquet_engine(path):
+    if _is_parquet(path):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit('Parquet output needs pyarrow (pip install pyarrow), or use a .csv --out') from None
+
+
+def _run_info_path(path):
+    # Parquet 디렉터리 안의 '_' 로 시작하는 파일은 read_parquet 가 무시한다
+    return os.path.join(path, '_run.json') if _is_parquet(path) else path + '.run.json'
+
+
+def _iso(day):
+    return pd.Timestamp(day).date().isoformat() if day is not None else None
+
+
+def _source_label(loader):
+    # 결과에 영향을 주는 데이터 소스 (OHLCVStore 는 내부 reader 기준)
+    source = loader or default_source()
+    source = getattr(source, 'reader', source)
+    root = getattr(source, 'root', None)
+    return f'{type(source).__name__}:{os.path.abspath(root)}' if root else type(source).__name__
+
+
+def check_run_info(path, info):
+    # 기존 출력의 실행 조건이 이번 실행과 다르면 ValueError, 같거나 처음이면 기록
+    info_path = _run_info_path(path)
+    if os.path.exists(info_path):
+        with open(info_path) as f:
+            previous = json.load(f)
+        if previous != info:
+            changed = ', '.join(f'{key}: {previous.get(key)} → {info.get(key)}'
+                                for key in sorted(set(previous) | set(info)) if previous.get(key) != info.get(key))
+            raise ValueError(f'{path} was written with different parameters ({changed}); '
+                             f'use another --out or pass the original --start/--end')
+        return
+    if os.path.exists(path) and (not os.path.isdir(path) or glob.glob(os.path.join(path, 'part-*.parquet'))):
+        print(f'warning: {path} has no run info; assuming it was written with {info}', file=sys.stderr)
+    if _is_parquet(path):
+        os.makedirs(path, exist_ok=True)
+    tmp = info_path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(info, f)
+    os.replace(tmp, info_path)
+
+
+def completed_codes(path):
+    # 이미 기록된 종목코드 (재시작 시 건너뛸 대상)
+    if _is_parquet(path):
+        parts = sorted(glob.glob(os.path.join(path, 'part-*.parquet')))
+        return set().union(*(set(pd.read_parquet(p, columns=['Code'])['Code']) for p in parts))
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return set()
+    return set(pd.read_csv(path, usecols=['Code'], dtype={'Code': str})['Code'])
+
+
+class ResultWriter:
+    def __init__(self, path, flush_rows=FLUSH_ROWS):
+        self.path = path
+        self.flush_rows = flush_rows if _is_parquet(path) else 1
+        self.written = 0
+        self._rows = []
+        if _is_parquet(path):
+            os.makedirs(path, exist_ok=True)
+            self._part = len(glob.glob(os.path.join(path, 'part-*.parquet')))
+
+    def write(self, row):
+        self._rows.append(row)
+        if len(self._rows) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        frame = pd.DataFrame(self._rows, columns=RESULT_COLUMNS).astype(RESULT_DTYPES)
+        if _is_parquet(self.path):
+            # 중간에 죽어도 반쯤 쓰인 part 가 남지 않도록 임시 파일에 쓴 뒤 이름을 바꾼다
+            final = os.path.join(self.path, f'part-{self._part:05d}.parquet')
+            frame.to_parquet(final + '.tmp', index=False)
+            os.replace(final + '.tmp', final)
+            self._part += 1
+        else:
+            header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, 'a', encoding='utf-8', newline='') as f:
+                frame.to_csv(f, header=header, index=False)
+        self.written += len(self._rows)
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+
+def run_batch(codes, out, start, end, loader=None, workers=None, chunk_size=8, resume=True,
+              listing=None, progress=None, fetch_workers=FETCH_WORKERS):
+    # 반환: (기록한 종목 수, 실패한 종목 수)
+    _require_parquet_engine(out)
+    if not resume and os.path.exists(out):
+        raise FileExistsError(f'{out} already exists (remove it or resume)')
+    check_run_info(out, {'start': _iso(start), 'end': _iso(end), 'source': _source_label(loader)})
+    done = completed_codes(out) if resume else set()
+    todo = [code for code in dict.fromkeys(codes) if code not in done]
+    names = listing.set_index('Code') if listing is not None else None
+
+    processed = failed = 0
+    with ResultWriter(out) as writer:
+        for row in iter_results(todo, start, end, loader, workers, chunk_size, fetch_workers):
+            processed += 1
+            if names is not None and row['Code'] in names.index:
+                row['Name'] = names.at[row['Code'], 'Name']
+                row['Market'] = names.at[row['Code'], 'Market'] if 'Market' in names else None
+            if row.get('Error', NO_DATA) != NO_DATA:
+                failed += 1
+            else:
+                writer.write(row)
+            if progress:
+                progress(processed, len(todo), row)
+    return processed - failed, failed
+
+
+def read_tickers_file(path):
+    # 한 줄에 종목 하나 (빈 줄, # 주석 무시)
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def resolve_codes(tickers, listing):
+    # 종목명 또는 종목코드 → 종목코드
+    name_to_code = dict(zip(listing['Name'], listing['Code']))
+    known = set(listing['Code'])
+    codes = []
+    for ticker in tickers:
+        code = name_to_code.get(ticker, ticker)
+        if code not in known:
+            raise SystemExit(f'unknown ticker: {ticker}')
+        codes.append(code)
+    return codes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Streamlit 없이 종목별 신호/백테스트 결과를 파일로 저장')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--tickers', nargs='+', help='종목코드 또는 종목명')
+    target.add_argument('--tickers-file', help='한 줄에 종목 하나씩 적힌 파일')
+    target.add_argument('--all', action='store_true', help='KRX 전 종목')
+    parser.add_argument('--start', type=date.fromisoformat,
+                        default=market_today() - timedelta(days=DEFAULT_LOOKBACK_DAYS))
+    parser.add_argument('--end', type=date.fromisoformat, default=market_today())
+    parser.add_argument('--out', required=True, help='.csv 파일 또는 .parquet 디렉터리')
+    parser.add_argument('--workers', type=int, default=None, help='프로세스 수 (기본: CPU 수, 1 이면 단일 프로세스)')
+    parser.add_argument('--chunk-size', type=int, default=8, help='프로세스 작업 하나에 묶을 종목 수')
+    parser.add_argument('--fetch-workers', type=int, default=FETCH_WORKERS, help='동시 다운로드 스레드 수')
+    parser.add_argument('--store', nargs='?', const='', default=None,
+                        help='로컬 OHLCV 저장소 사용 (경로 생략 시 기본 위치)')
+    parser.add_argument('--no-resume', action='store_true', help='기존 결과가 있으면 이어 쓰지 않고 중단')
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args(argv)
+    _require_parquet_engine(args.out)
+
+    listing = default_source().listing('KRX')
+    if args.all:
+        codes = listing['Code'].tolist()
+    else:
+        codes = resolve_codes(read_tickers_file(args.tickers_file) if args.tickers_file else args.tickers, listing)
+
+    loader = default_source()
+    if args.store is not None:
+        loader = OHLCVStore(args.store) if args.store else OHLCVStore()
+
+    def progress(done, total, row):
+        if not args.quiet:
+            status = row.get('Error') or f"F&G {row['FearGreedScore']:.2f}"
+            print(f"[{done}/{total}] {row['Code']} {row.get('Name') or ''} {status}", file=sys.stderr)
+
+    try:
+        written, failed = run_batch(codes, args.out, args.start, args.end, loader, args.workers, args.chunk_size,
+                                    resume=not args.no_resume, listing=listing, progress=progress,
+                                    fetch_workers=args.fetch_workers)
+    except (FileExistsError, ValueError) as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    print(f'{written} tickers written to {args.out}, {failed} failed (rerun to retry)', file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+from backtest import run_backtest
+from benchmarks.synthetic import synthetic_universe
+from indicators import clean_daily, to_weekly, add_signals, add_fear_greed
+
+# --------------------------------------------------------------------------
+# ⏱️ 파이프라인 단계별 벤치마크
+# --------------------------------------------------------------------------
+# 사용법 (저장소 루트에서):
+#   python -m benchmarks.run --sizes small medium            # 측정 + 기준값과 비교
+#   python -m benchmarks.run --sizes small --update-baseline # 기준값 갱신
+#   python -m benchmarks.run --source <LocalSource 디렉터리>   # 저장된 파일에서 읽기 (로드 포함)
+# 단계별 시간은 전 종목 합계, 메모리는 첫 종목에서 tracemalloc 으로 잰 단계별 최대치다.
+# 측정 전에 첫 종목으로 모든 단계를 한 번 돌려 첫 호출 비용(차트 폰트 로딩, 지연 import)을 뺀다.
+# 기준값보다 tolerance 이상 느려지거나 메모리가 늘어난 단계가 있으면 종료 코드 1.
+# 시간은 TIMING_GATED_SIZES 크기만 비교한다. small 은 종목 하나라 같은 트리에서도 실행마다
+# 몇 ms 단계는 두 배 가까이, 차트는 ±20% 흔들리므로 시간은 출력만 하고 메모리만 판정한다.
+# 장비 전체의 속도 변화(CPU 클럭, 같은 호스트의 다른 작업)는 모든 단계를 같은 비율로 늦추므로,
+# 단계별 (측정값 / 기준값) 비율의 중앙값을 그 실행의 장비 속도로 보고, 1 보다 크면(장비가 느려졌으면)
+# 기준값에 곱해 비교한다 (빨라진 실행에서 기준을 좁히지는 않는다).
+# 단계 하나가 느려지면 그 단계만 튀어 잡히고, 모든 단계가 똑같이 느려지는 변화는 잡히지 않는다.
+# 요청한 크기의 기준값이 baseline.json 에 없어도 비교를 건너뛰지 않고 종료 코드 1
+# (저장소의 baseline.json 은 small / medium 기준값. 다른 장비에서 CI 를 돌리면 그 장비에서
+#  --update-baseline 으로 다시 만든다).
+SIZES = {
+    'small': (1, 3),      # 종목 수, 연수
+    'medium': (100, 10),
+    'large': (3000, 30),
+}
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+CHART_TICKERS = 3  # 차트는 느리므로 몇 종목만 렌더링 (실행 전체에 고르게 퍼뜨려 다른 단계와 같은 잡음을 받게)
+MIN_DELTA = {'seconds': 0.002, 'peak_kb': 64}  # 이보다 작은 차이는 측정 잡음으로 본다
+TIMING_GATED_SIZES = {'medium', 'large'}
+
+
+def _stages(include_chart):
+    state = {}
+
+    def resample(df):
+        state['weekly'] = to_weekly(clean_daily(df))
+
+    def signals(_):
+        add_signals(state['weekly'])
+
+    def fear_greed(_):
+        add_fear_greed(state['weekly'])
+
+    def backtest_original(_):
+        state['original'] = run_backtest(state['weekly'], revised=False)
+
+    def backtest_revised(_):
+        state['revised'] = run_backtest(state['weekly'], revised=True)
+
+    stages = [('resample', resample), ('signals', signals), ('fear_greed', fear_greed),
+              ('backtest_original', backtest_original), ('backtest_revised', backtest_revised)]
+
+    if include_chart:
+        from charts import _chart_cache, render_chart
+
+        def chart(_):
+            weekly = state['weekly'].copy()
+            bt_df, _, actual_sell = state['revised']
+            weekly['ActualSellSignal'] = actual_sell
+            _chart_cache.clear()
+            render_chart(weekly, bt_df)
+
+        stages.append(('chart', chart))
+    return stages
+
+
+def _local_universe(source, n_tickers, totals):
+    # LocalSource 의 앞쪽 n_tickers 종목을 읽으며 로드 시간을 'load' 단계로 합산
+    for code in source.listing()['Code'].head(n_tickers):
+        start = time.perf_counter()
+        df = source.daily(code)
+        totals['load'] = totals.get('load', 0.0) + time.perf_counter() - start
+        yield code, df
+
+
+def run_size(name, n_tickers, n_years, repeat=1, include_chart=True, seed=0, source=None):
+    # source: datasource.LocalSource 를 넘기면 합성 데이터 대신 그 파일들을 읽는다 (n_years 무시)
+    totals = {}
+    peaks = {}
+    universe = (_local_universe(source, n_tickers, totals) if source is not None
+                else synthetic_universe(n_tickers, n_years, seed=seed))
+    chart_every = max(1, n_tickers // CHART_TICKERS)
+    for i, (code, df) in enumerate(universe):
+        if i == 0:
+            for _, func in _stages(include_chart):  # 준비 실행 (측정 안 함)
+                func(df)
+        for stage, func in _stages(include_chart and i % chart_every == 0 and i // chart_every < CHART_TICKERS):
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func(df)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            totals[stage] = totals.get(stage, 0.0) + best
+        if i == 0:
+            # 메모리 측정은 별도 패스 (tracemalloc 이 시간 측정을 왜곡하지 않도록)
+            for stage, func in _stages(include_chart):
+                tracemalloc.start()
+                func(df)
+                peaks[stage] = tracemalloc.get_traced_memory()[1] // 1024
+                tracemalloc.stop()
+    return {stage: {'seconds': round(totals[stage], 6), 'peak_kb': peaks.get(stage)} for stage in totals}
+
+
+def machine_speed(stages, base_stages):
+    # 단계별 시간 비율 (측정 / 기준) 의 중앙값
+    ratios = [metrics['seconds'] / base_stages[stage]['seconds'] for stage, metrics in stages.items()
+              if base_stages.get(stage, {}).get('seconds') and metrics.get('seconds')]
+    return statistics.median(ratios) if ratios else 1.0
+
+
+def compare(results, baseline, tolerance):
+    # 반환: (악화 목록, 기준값이 없는 (크기, 단계) 목록 — 단계가 None 이면 크기 전체)
+    regressions, missing = [], []
+    for size, stages in results.items():
+        if size not in baseline:
+            missing.append((size, None))
+            continue
+        speed = max(machine_speed(stages, baseline[size]), 1.0)
+        for stage, metrics in stages.items():
+            base = baseline[size].get(stage)
+            if not base:
+                missing.append((size, stage))
+                continue
+            for key in ('seconds', 'peak_kb'):
+                if not base.get(key) or not metrics.get(key):
+                    continue
+                if key == 'seconds' and size not in TIMING_GATED_SIZES:
+                    continue
+                expected = base[key] * speed if key == 'seconds' else base[key]
+                if metrics[key] > expected * (1 + tolerance) and metrics[key] - expected > MIN_DELTA[key]:
+                    regressions.append((size, stage, key, base[key], metrics[key]))
+    return regressions, missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='오프라인 파이프라인 벤치마크')
+    parser.add_argument('--sizes', nargs='+', default=['small'], choices=list(SIZES))
+    parser.add_argument('--repeat', type=int, default=3, help='단계별 반복 횟수 (최솟값 사용)')
+    parser.add_argument('--no-chart', action='store_true', help='차트 렌더링 단계 제외')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='허용 악화 비율 (0.25 = 25%%)')
+    parser.add_argument('--source', help='합성 데이터 대신 읽을 LocalSource 디렉터리 (로드 시간 포함)')
+    args = parser.parse_args(argv)
+    source = None
+    if args.source:
+        from datasource import LocalSource
+        source = LocalSource(args.source)
+
+    results = {}
+    for size in args.sizes:
+        n_tickers, n_years = SIZES[size]
+        results[size] = run_size(size, n_tickers, n_years, args.repeat, not args.no_chart, source=source)
+        for stage, metrics in results[size].items():
+            print(f"{size:>6} {stage:<18} {metrics['seconds']:>10.4f}s {metrics['peak_kb'] or 0:>10,} KB")
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'max RSS: {max_rss_mb:,.1f} MB')
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f'baseline updated: {args.baseline}')
+        return 0
+
+    regressions, missing = compare(results, baseline, args.tolerance)
+    for size in results:
+        if size in baseline and size in TIMING_GATED_SIZES:
+            print(f'{size}: machine speed vs baseline ×{machine_speed(results[size], baseline[size]):.2f}')
+    for size, stage, key, base, value in regressions:
+        print(f'REGRESSION {size}/{stage} {key}: {base} → {value}')
+    for size, stage in missing:
+        # 단계 하나가 새로 생긴 경우는 경고만, 크기 전체의 기준값이 없으면 실패
+        label = 'NO BASELINE' if stage is None else 'WARNING no baseline for'
+        print(f"{label} {size}{'/' + stage if stage else ''} in {args.baseline} (run with --update-baseline)",
+              file=sys.stderr)
+    return 1 if regressions or any(stage is None for _, stage in missing) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
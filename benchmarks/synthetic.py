@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------------------------------
+# 🧪 합성 일봉 데이터 (오프라인 벤치마크용)
+# --------------------------------------------------------------------------
+# fdr.DataReader 결과와 같은 모양(Open/High/Low/Close/Volume/Change, DatetimeIndex)의
+# 랜덤워크 일봉을 만든다. 휴장일, 가격이 0인 행(거래정지), NaN 행을 일정 비율로 섞는다.
+FIXED_HOLIDAYS = ['01-01', '03-01', '05-05', '06-06', '08-15', '10-03', '10-09', '12-25']
+
+
+def synthetic_daily(n_years=3, seed=0, start='1995-01-02', daily_vol=0.02, holiday_rate=0.02,
+                    zero_rate=0.002, nan_rate=0.002):
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(start, periods=int(252 * n_years))
+    days = days[~days.strftime('%m-%d').isin(FIXED_HOLIDAYS)]
+    days = days[rng.random(len(days)) >= holiday_rate]
+    n = len(days)
+
+    close = rng.uniform(1_000, 200_000) * np.exp(np.cumsum(rng.normal(0.0002, daily_vol, n)))
+    open_ = close * np.exp(rng.normal(0, daily_vol / 2, n))
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, daily_vol / 2, n)))
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, daily_vol / 2, n)))
+    volume = rng.lognormal(12, 1, n).astype('int64')
+
+    df = pd.DataFrame({
+        'Open': np.round(open_), 'High': np.round(high), 'Low': np.round(low), 'Close': np.round(close),
+        'Volume': volume,
+    }, index=pd.DatetimeIndex(days, name='Date'))
+    df.loc[rng.random(n) < zero_rate, ['Open', 'High', 'Low', 'Close']] = 0
+    df.loc[rng.random(n) < nan_rate, 'Close'] = np.nan
+    df['Change'] = df['Close'].pct_change()
+    return df
+
+
+def synthetic_universe(n_tickers, n_years, seed=0, **kwargs):
+    # (종목코드, 일봉) 을 하나씩 생성 — 3,000 종목 × 30년도 메모리에 한꺼번에 올리지 않는다
+    for i in range(n_tickers):
+        yield f'{i:06d}', synthetic_daily(n_years, seed=seed + i, **kwargs)
+
+
+def write_local_source(root, n_tickers, n_years, seed=0, **kwargs):
+    # 합성 종목 목록 + 일봉을 datasource.LocalSource 형식으로 저장
+    # (MARKET_DATA_DIR=<root> 로 앱/스캐너/배치를 네트워크 없이 실행)
+    from datasource import LocalSource
+
+    source = LocalSource(root)
+    codes = []
+    for code, df in synthetic_universe(n_tickers, n_years, seed=seed, **kwargs):
+        source.save_daily(code, df)
+        codes.append(code)
+    source.save_listing(pd.DataFrame({
+        'Code': codes, 'Name': [f'합성{code}' for code in codes], 'Market': 'KOSPI',
+    }))
+    return source
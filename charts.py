@@ -0,0 +1,160 @@
+import hashlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import telemetry
+from pipeline import LRUCache
+
+# --------------------------------------------------------------------------
+# 🖼️ 차트 렌더링 (캐싱 + 긴 기간 데시메이션)
+# --------------------------------------------------------------------------
+# pyplot 전역 상태를 거치지 않고 Figure 를 직접 만들어 PNG 로 렌더링한 뒤 바로 정리한다.
+# 같은 데이터/옵션이면 해시 키로 캐시된 PNG 를 재사용하고, 점이 많으면 LTTB 로 선을
+# 줄이되 매수/매도 신호가 있는 주는 항상 남긴다.
+MAX_POINTS = 600
+CHART_CACHE_MB = int(os.environ.get('CHART_CACHE_MB', '64'))
+
+_chart_cache = LRUCache(max_bytes=CHART_CACHE_MB * 1024 * 1024)
+
+
+def lttb_indices(x, y, n_out):
+    # Largest-Triangle-Three-Buckets: 선 모양을 보존하는 n_out 개 점의 인덱스
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='f8')
+    y = np.asarray(y, dtype='f8')
+    every = (n - 2) / (n_out - 2)
+    selected = np.empty(n_out, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        next_lo, next_hi = hi, min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def decimate(weekly, max_points=MAX_POINTS):
+    # 종가 기준 LTTB + 신호가 있는 주는 모두 유지
+    if len(weekly) <= max_points:
+        return weekly
+    keep = lttb_indices(weekly.index.asi8, weekly['Close'].to_numpy(), max_points)
+    markers = np.zeros(len(weekly), dtype=bool)
+    for col in ('BuySignal', 'ActualSellSignal'):
+        if col in weekly:
+            markers |= weekly[col].to_numpy() == 1
+    keep = np.union1d(keep, np.flatnonzero(markers))
+    return weekly.iloc[keep]
+
+
+def _chart_key(weekly, bt_df, options):
+    digest = hashlib.sha1(repr(sorted(options.items())).encode())
+    cols = [c for c in ('Close', 'MA10', 'BuySignal', 'ActualSellSignal', 'FearGreedScore') if c in weekly]
+    digest.update(pd.util.hash_pandas_object(weekly[cols], index=True).to_numpy().tobytes())
+    if bt_df is not None and not bt_df.empty:
+        digest.update(pd.util.hash_pandas_object(bt_df[['EntryDate', 'EntryPrice']], index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _draw(weekly, bt_df, entry_shift_days, label_suffix, fg_guides, figsize):
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    ax1 = fig.subplots()
+    buys = weekly[weekly['BuySignal'] == 1]
+    sells = weekly[weekly['ActualSellSignal'] == 1]
+    ax1.plot(weekly.index, weekly['Close'], label='종가', color='black')
+    ax1.plot(weekly.index, weekly['MA10'], label='MA10', linestyle='--', color='gray')
+    ax1.scatter(buys.index, buys['Close'], color='lightcoral', marker='^', s=70, alpha=0.5, label='잠재 매수')
+    if bt_df is not None and not bt_df.empty:
+        ax1.scatter(bt_df['EntryDate'] + pd.Timedelta(days=entry_shift_days), bt_df['EntryPrice'], color='red',
+                    marker='^', s=100, label=f'실제 매수{label_suffix}')
+    ax1.scatter(sells.index, sells['Close'], color='blue', marker='v', s=100, label=f'실제 매도{label_suffix}')
+    ax1.set_ylabel('종가')
+    ax1.grid(True)
+    ax2 = ax1.twinx()
+    ax2.plot(weekly.index, weekly['FearGreedScore'], label='F&G 지수', color='darkorange')
+    if fg_guides:
+        ax2.axhline(0.5, color='r', linestyle='--', linewidth=0.8)
+        ax2.axhline(-0.5, color='g', linestyle='--', linewidth=0.8)
+    ax2.set_ylabel('Fear & Greed 지수', color='darkorange')
+    fig.legend(loc='upper center', bbox_to_anchor=(0.5, 0.05), fancybox=True, shadow=True, ncol=5)
+    return fig
+
+
+def render_chart(weekly, bt_df, entry_shift_days=0, label_suffix='', fg_guides=False, figsize=(10, 7),
+                 max_points=MAX_POINTS):
+    # weekly 에는 Close / MA10 / BuySignal / ActualSellSignal / FearGreedScore 가 있어야 한다
+    # 반환: PNG 바이트 (st.image 로 출력)
+    options = {'entry_shift_days': entry_shift_days, 'label_suffix': label_suffix, 'fg_guides': fg_guides,
+               'figsize': figsize, 'max_points': max_points}
+    key = _chart_key(weekly, bt_df, options)
+
+    def draw():
+        with telemetry.span('chart.render'):
+            fig = _draw(decimate(weekly, max_points), bt_df, entry_shift_days, label_suffix, fg_guides, figsize)
+            buf = io.BytesIO()
+            try:
+                fig.savefig(buf, format='png', bbox_inches='tight')
+            finally:
+                fig.clear()
+        return buf.getvalue()
+
+    return _chart_cache.get_or_compute(key, draw, name='chart')
+
+
+# --------------------------------------------------------------------------
+# 🪶 클라이언트 렌더링용 Vega-Lite 스펙 (st.vega_lite_chart)
+# --------------------------------------------------------------------------
+def chart_spec(weekly, bt_df=None, entry_shift_days=0, max_points=MAX_POINTS):
+    data = decimate(weekly, max_points)
+    records = pd.DataFrame({
+        'Date': data.index.strftime('%Y-%m-%d'),
+        'Close': data['Close'].to_numpy(),
+        'MA10': data['MA10'].to_numpy(),
+        'FearGreedScore': data['FearGreedScore'].to_numpy(),
+        'Marker': np.select([data['ActualSellSignal'].to_numpy() == 1, data['BuySignal'].to_numpy() == 1],
+                            ['실제 매도', '잠재 매수'], default=''),
+        'Kind': 'bar',
+    })
+    if bt_df is not None and not bt_df.empty:
+        entries = pd.DataFrame({
+            'Date': (bt_df['EntryDate'] + pd.Timedelta(days=entry_shift_days)).dt.strftime('%Y-%m-%d'),
+            'Close': bt_df['EntryPrice'].to_numpy(), 'Marker': '실제 매수', 'Kind': 'entry',
+        })
+        records = pd.concat([records, entries], ignore_index=True)
+    values = records.astype(object).where(records.notna(), None).to_dict('records')
+
+    x = {'field': 'Date', 'type': 'temporal', 'title': None}
+    price = {'type': 'quantitative', 'title': '종가'}
+    bars_only = [{'filter': "datum.Kind == 'bar'"}]
+    return {
+        'data': {'values': values},
+        'layer': [
+            {'layer': [
+                {'transform': bars_only, 'mark': {'type': 'line', 'color': 'black'},
+                 'encoding': {'x': x, 'y': {**price, 'field': 'Close'}}},
+                {'transform': bars_only, 'mark': {'type': 'line', 'color': 'gray', 'strokeDash': [4, 4]},
+                 'encoding': {'x': x, 'y': {**price, 'field': 'MA10'}}},
+                {'transform': [{'filter': "datum.Marker != ''"}],
+                 'mark': {'type': 'point', 'filled': True, 'size': 80},
+                 'encoding': {'x': x, 'y': {**price, 'field': 'Close'},
+                              'shape': {'field': 'Marker', 'type': 'nominal', 'title': None},
+                              'color': {'field': 'Marker', 'type': 'nominal', 'title': None,
+                                        'scale': {'domain': ['잠재 매수', '실제 매수', '실제 매도'],
+                                                  'range': ['lightcoral', 'red', 'blue']}}}},
+            ]},
+            {'transform': bars_only, 'mark': {'type': 'line', 'color': 'darkorange'},
+             'encoding': {'x': x, 'y': {'field': 'FearGreedScore', 'type': 'quantitative',
+                                        'title': 'Fear & Greed 지수'}}},
+        ],
+        'resolve': {'scale': {'y': 'independent'}},
+    }
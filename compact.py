@@ -0,0 +1,228 @@
+import argparse
+import json
+import os
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from backtest import run_backtest
+from datasource import FETCH_WORKERS, ConcurrentFetcher
+from indicators import add_signals, add_fear_greed, compute_weekly
+
+# --------------------------------------------------------------------------
+# 🗜️ 전 종목 일괄 처리용 압축 주봉 저장 형식
+# --------------------------------------------------------------------------
+# compute_weekly() 결과(float64 컬럼 16개)를 종목 전체에 대해 이어 붙인 연속 배열로 저장한다.
+#  - 가격: float32 (KRX 가격은 정수 원 단위이고 2^24 = 16,777,216 원 미만이면 float32 로 정확)
+#  - 거래량: int64 (주간 합계가 2^31 을 넘는 종목이 있다)
+#  - 날짜: 1970-01-01 기준 일수 int32
+#  - MA10 / CMF / FearGreedScore: float32
+#  - BuySignal / SellSignal: 비트맵 (봉당 1비트, np.packbits)
+#  - Prev_High, Momentum5, Position52W 등 중간 컬럼은 저장하지 않고 필요할 때 다시 계산
+# 종목 구간은 offsets[i]:offsets[i+1] 로 찾는다 (CSR 형식). 각 배열은 <root>/<name>.bin
+# 파일 하나이고 읽을 때는 np.memmap 이므로, 프로세스 풀 작업자들이 같은 파일을 열면
+# 페이지 캐시를 공유해 복사 없이 함께 쓴다 (피클링 시 경로만 넘어간다).
+# 일괄 소비자: portfolio.align_universe 가 column() / signal() 로 (주 × 종목) 행렬을 바로 만든다
+# (python portfolio.py --universe <root>). frame() 은 종목 하나를 run_backtest / 차트에 넘길 때만 쓴다.
+#
+# 종목당 메모리 예산 (주봉 1개당 BYTES_PER_WEEK = 40.25 바이트):
+#   10년(≈520주) ≈ 21 KB, 30년(≈1,560주) ≈ 63 KB  → KRX 2,700 종목 × 30년 ≈ 170 MB
+#   (compute_weekly() 의 float64 DataFrame 은 주당 136 바이트(16 컬럼 + 인덱스),
+#    30년 기준 종목당 ≈ 210 KB, 전 종목 ≈ 570 MB → 약 3.4배)
+COLUMNS = {
+    'Date': '<i4', 'Open': '<f4', 'High': '<f4', 'Low': '<f4', 'Close': '<f4', 'Volume': '<i8',
+    'MA10': '<f4', 'CMF': '<f4', 'FearGreedScore': '<f4',
+}
+SIGNALS = ['BuySignal', 'SellSignal']
+BYTES_PER_WEEK = sum(np.dtype(dtype).itemsize for dtype in COLUMNS.values()) + len(SIGNALS) / 8
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+
+def memory_budget(n_weeks, n_tickers=1):
+    # 종목당 n_weeks 주씩 n_tickers 종목을 압축 형식으로 담는 데 필요한 바이트 수 (offsets 포함)
+    return int(np.ceil(n_weeks * n_tickers * BYTES_PER_WEEK)) + 8 * (n_tickers + 1)
+
+
+def _days(index):
+    return (index.values.astype('datetime64[D]').astype('i8')).astype('<i4')
+
+
+def write_universe(root, items):
+    # items: (종목코드, compute_weekly 결과) 를 내보내는 iterable. 종목 단위로 파일에 이어 쓰므로
+    # 한 번에 한 종목만 메모리에 올라온다.
+    os.makedirs(root, exist_ok=True)
+    files = {name: open(os.path.join(root, f'{name}.bin.tmp'), 'wb') for name in list(COLUMNS) + SIGNALS}
+    codes, offsets = [], [0]
+    try:
+        for code, weekly in items:
+            if weekly is None or weekly.empty:
+                continue
+            files['Date'].write(_days(weekly.index).tobytes())
+            for name, dtype in COLUMNS.items():
+                if name != 'Date':
+                    files[name].write(weekly[name].to_numpy().astype(dtype).tobytes())
+            for name in SIGNALS:
+                files[name].write((weekly[name].to_numpy() == 1).tobytes())
+            codes.append(code)
+            offsets.append(offsets[-1] + len(weekly))
+    finally:
+        for f in files.values():
+            f.close()
+
+    # 신호는 bool 로 모아 둔 뒤 마지막에 한 번에 비트로 묶는다
+    for name in SIGNALS:
+        tmp = os.path.join(root, f'{name}.bin.tmp')
+        bits = np.packbits(np.fromfile(tmp, dtype=bool), bitorder='little')
+        bits.tofile(tmp)
+    for name in list(COLUMNS) + SIGNALS:
+        os.replace(os.path.join(root, f'{name}.bin.tmp'), os.path.join(root, f'{name}.bin'))
+    np.asarray(offsets, dtype='<i8').tofile(os.path.join(root, 'offsets.bin'))
+    with open(os.path.join(root, 'meta.json'), 'w') as f:
+        json.dump({'codes': codes, 'columns': COLUMNS, 'signals': SIGNALS}, f)
+    return CompactUniverse(root)
+
+
+class CompactUniverse:
+    def __init__(self, root):
+        self.root = root
+        self._open()
+
+    def _open(self):
+        with open(os.path.join(self.root, 'meta.json')) as f:
+            meta = json.load(f)
+        self.codes = meta['codes']
+        self._index = {code: i for i, code in enumerate(self.codes)}
+        self.offsets = np.fromfile(os.path.join(self.root, 'offsets.bin'), dtype='<i8')
+        self.arrays = {name: self._memmap(name, dtype) for name, dtype in COLUMNS.items()}
+        self.bits = {name: self._memmap(name, 'u1') for name in SIGNALS}
+
+    def _memmap(self, name, dtype):
+        path = os.path.join(self.root, f'{name}.bin')
+        if os.path.getsize(path) == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r')
+
+    # 작업자 프로세스로는 경로만 넘기고 그쪽에서 다시 memmap (복사 없음)
+    def __getstate__(self):
+        return {'root': self.root}
+
+    def __setstate__(self, state):
+        self.root = state['root']
+        self._open()
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, code):
+        return code in self._index
+
+    @property
+    def nbytes(self):
+        return int(sum(a.nbytes for a in self.arrays.values()) + sum(b.nbytes for b in self.bits.values())
+                   + self.offsets.nbytes)
+
+    def span(self, code):
+        i = self._index[code]
+        return int(self.offsets[i]), int(self.offsets[i + 1])
+
+    def column(self, code, name):
+        # 복사 없는 memmap 슬라이스
+        lo, hi = self.span(code)
+        return self.arrays[name][lo:hi]
+
+    def signal(self, code, name):
+        # 비트맵에서 해당 종목 구간만 풀어서 bool 배열로
+        lo, hi = self.span(code)
+        byte_lo = lo // 8
+        chunk = np.unpackbits(self.bits[name][byte_lo:(hi + 7) // 8], bitorder='little')
+        return chunk[lo - byte_lo * 8:hi - byte_lo * 8].astype(bool)
+
+    def dates(self, code):
+        return pd.DatetimeIndex(self.column(code, 'Date').astype('datetime64[D]').astype('datetime64[ns]'),
+                                name='Date')
+
+    def frame(self, code, full=False):
+        # run_backtest / 차트에 넘길 수 있는 주봉 (float64 로 올려서 반환)
+        # full=True 이면 저장하지 않은 중간 컬럼까지 float32 가격으로 다시 계산한다
+        weekly = pd.DataFrame({name: self.column(code, name).astype('f8' if name != 'Volume' else 'i8')
+                               for name in COLUMNS if name != 'Date'}, index=self.dates(code))
+        for name in SIGNALS:
+            weekly[name] = self.signal(code, name).astype('i8')
+        if full:
+            stored = weekly[['MA10', 'CMF', 'FearGreedScore'] + SIGNALS].copy()
+            weekly = add_fear_greed(add_signals(weekly[PRICE_COLUMNS + ['Volume']].copy()))
+            weekly[stored.columns] = stored
+        return weekly
+
+
+# --------------------------------------------------------------------------
+# 🎯 float64 경로와의 정확도 비교
+# --------------------------------------------------------------------------
+def accuracy_check(universe, code, weekly64):
+    # weekly64: 같은 종목의 compute_weekly() 결과 (float64)
+    compact = universe.frame(code)
+    price_err = max(float(np.nanmax(np.abs(compact[c].to_numpy() / weekly64[c].to_numpy() - 1)))
+                    for c in PRICE_COLUMNS)
+    fg_err = float(np.nanmax(np.abs(compact['FearGreedScore'] - weekly64['FearGreedScore']), initial=0))
+
+    # float32 가격으로 신호를 다시 계산했을 때 달라지는 봉 수
+    recomputed = add_signals(compact[PRICE_COLUMNS + ['Volume']].copy())
+    signal_flips = int(sum((recomputed[name] != weekly64[name]).sum() for name in SIGNALS))
+
+    summary64 = run_backtest(weekly64, revised=True)[1]
+    summary32 = run_backtest(compact, revised=True)[1]
+    return {
+        'weeks': len(weekly64),
+        'max_price_rel_err': price_err,
+        'max_fg_abs_err': fg_err,
+        'signals_equal': all(np.array_equal(compact[n].to_numpy(), weekly64[n].to_numpy()) for n in SIGNALS),
+        'signal_flips_recomputed': signal_flips,
+        'cum_return_abs_err': float(abs(summary32['cum_return'] - summary64['cum_return'])),
+        'trades_equal': summary32['total_trades'] == summary64['total_trades'],
+    }
+
+
+def main(argv=None):
+    from store import OHLCVStore, market_today
+
+    parser = argparse.ArgumentParser(description='KRX 주봉을 압축 형식으로 저장하고 float64 결과와 비교')
+    parser.add_argument('root', help='출력 디렉터리')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--tickers', nargs='+')
+    target.add_argument('--all', action='store_true', help='KRX 전 종목')
+    parser.add_argument('--start', type=date.fromisoformat, default=market_today() - timedelta(days=30 * 365))
+    parser.add_argument('--end', type=date.fromisoformat, default=market_today())
+    parser.add_argument('--check', type=int, default=5, help='정확도를 비교할 종목 수 (앞에서부터)')
+    parser.add_argument('--fetch-workers', type=int, default=FETCH_WORKERS, help='동시 다운로드 스레드 수')
+    args = parser.parse_args(argv)
+
+    from datasource import default_source
+    loader = OHLCVStore()
+    if args.all:
+        codes = default_source().listing('KRX')['Code'].tolist()
+    else:
+        codes = args.tickers
+
+    def weeklies(fetcher):
+        # 다운로드는 스레드로 겹쳐 받고 (완료 순서), 주봉 계산과 쓰기는 한 종목씩
+        for code, df in fetcher.fetch_many(codes, args.start, args.end):
+            if isinstance(df, Exception):
+                print(f'skip {code}: {df!r}', file=sys.stderr)
+                continue
+            yield code, compute_weekly(df) if not df.empty else None
+
+    with ConcurrentFetcher(loader, args.fetch_workers) as fetcher:
+        universe = write_universe(args.root, weeklies(fetcher))
+    n_weeks = int(universe.offsets[-1])
+    print(f'{len(universe)} tickers, {n_weeks:,} weeks, {universe.nbytes / 1024:,.1f} KB '
+          f'({BYTES_PER_WEEK} B/week, float64 DataFrame ≈ {n_weeks * 136 / 1024:,.1f} KB)')
+    for code in universe.codes[:args.check]:
+        report = accuracy_check(universe, code, compute_weekly(loader(code, start=args.start, end=args.end)))
+        print(code, report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1 @@
+# pytest 가 tests/ 에서 저장소 루트의 모듈(backtest, indicators ...)을 import 할 수 있도록 둔다
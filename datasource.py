@@ -0,0 +1,232 @@
+import logging
+import os
+import random
+import threading
+import time
+import urllib.error
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+# --------------------------------------------------------------------------
+# 🔌 시세 데이터 소스 (FinanceDataReader / 로컬 파일) + 동시 다운로드
+# --------------------------------------------------------------------------
+# 앱·스캐너·배치·저장소는 fdr 를 직접 부르지 않고 데이터 소스를 통해 종목 목록과 일봉을 받는다.
+# 데이터 소스는 두 메서드만 있으면 된다.
+#   listing(market='KRX')            → 'Code' / 'Name' (/ 'Market') 컬럼의 종목 목록
+#   daily(code, start=None, end=None) → fdr.DataReader 와 같은 모양의 일봉
+# 인스턴스 자체를 loader(code, start=..., end=...) 로 호출할 수도 있다.
+#  - FdrSource: FinanceDataReader 호출에 요청 속도 제한 + 지수 백오프 재시도
+#    (네트워크 장애·시간 초과·429/5xx 만 재시도, 잘못된 종목코드 같은 오류는 바로 올린다)
+#  - LocalSource: <root>/listing.csv, <root>/daily/<code>.csv 파일 기반 (오프라인 테스트/벤치마크)
+#  - ConcurrentFetcher: 여러 종목을 스레드 풀로 동시에 받아 완료 순서대로 내보냄
+#    (동시에 진행 중인 요청 수를 제한해 종목 수와 무관하게 메모리가 일정)
+# 스캐너·배치처럼 프로세스 풀을 쓰는 곳도 다운로드는 부모 프로세스의 ConcurrentFetcher 한 곳에서
+# 하고 계산만 작업자에게 넘긴다. 그래야 소스 하나의 속도 제한이 전체 요청 속도가 된다.
+# MARKET_DATA_DIR 환경 변수가 있으면 기본 소스가 해당 디렉터리의 LocalSource 가 된다.
+MARKET_DATA_DIR = os.environ.get('MARKET_DATA_DIR', '')
+FDR_RATE_PER_SEC = float(os.environ.get('FDR_RATE_PER_SEC', '5'))
+FDR_RETRIES = int(os.environ.get('FDR_RETRIES', '3'))
+FETCH_WORKERS = int(os.environ.get('FETCH_WORKERS', '8'))
+BACKOFF_SECONDS = 0.5
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    # 토큰 버킷: 초당 rate 개, 최대 burst 개까지 몰아서 허용 (스레드 안전)
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._init_state()
+
+    def _init_state(self):
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    # 피클링은 되지만 Lock 과 토큰은 프로세스마다 새로 만들어진다 (작업자마다 따로 제한되므로
+    # 여러 프로세스에서 받으면 실제 속도가 작업자 수 × rate 가 된다)
+    def __getstate__(self):
+        return {'rate': self.rate, 'burst': self.burst}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_state()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_transient(exc):
+    # 다시 시도하면 성공할 수 있는 오류인지 (연결 실패, 시간 초과, 429 / 5xx 응답)
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    response = getattr(exc, 'response', None)
+    status = getattr(response, 'status_code', None) or getattr(exc, 'code', None)
+    if status in TRANSIENT_STATUS:
+        return True
+    if isinstance(exc, urllib.error.URLError) and not isinstance(exc, urllib.error.HTTPError):
+        return True  # DNS 실패, 연결 거부 등
+    try:
+        import requests
+    except ImportError:
+        return False
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout))
+
+
+def with_retry(func, retries=FDR_RETRIES, backoff=BACKOFF_SECONDS, retry_if=is_transient):
+    # retry_if(예외) 가 참이면 backoff * 2^n 초(+지터) 기다렸다가 다시 시도.
+    # 영구 오류와 마지막 실패는 그대로 올린다
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except Exception as exc:
+            if attempt == retries or not retry_if(exc):
+                raise
+            delay = backoff * 2 ** attempt * (1 + random.random() / 2)
+            logger.warning('retry %d/%d after %.1fs: %r', attempt + 1, retries, delay, exc)
+            time.sleep(delay)
+
+
+class DataSource:
+    def listing(self, market='KRX'):
+        raise NotImplementedError
+
+    def daily(self, code, start=None, end=None):
+        raise NotImplementedError
+
+    def __call__(self, code, start=None, end=None):
+        return self.daily(code, start=start, end=end)
+
+
+class FdrSource(DataSource):
+    def __init__(self, rate_per_sec=FDR_RATE_PER_SEC, retries=FDR_RETRIES, backoff=BACKOFF_SECONDS):
+        self.limiter = RateLimiter(rate_per_sec)
+        self.retries = retries
+        self.backoff = backoff
+
+    def _call(self, func, *args, **kwargs):
+        def attempt():
+            self.limiter.acquire()
+            return func(*args, **kwargs)
+        return with_retry(attempt, self.retries, self.backoff)
+
+    def listing(self, market='KRX'):
+        import FinanceDataReader as fdr
+        return self._call(fdr.StockListing, market)
+
+    def daily(self, code, start=None, end=None):
+        import FinanceDataReader as fdr
+        return self._call(fdr.DataReader, code, start=start, end=end)
+
+
+class LocalSource(DataSource):
+    # 파일 기반 대체 소스. save_* 로 다른 소스의 결과나 합성 데이터를 저장해 둘 수 있다.
+    def __init__(self, root=MARKET_DATA_DIR):
+        self.root = root
+
+    def _daily_path(self, code):
+        return os.path.join(self.root, 'daily', f'{code}.csv')
+
+    def listing(self, market='KRX'):
+        listing = pd.read_csv(os.path.join(self.root, 'listing.csv'), dtype={'Code': str})
+        if market != 'KRX' and 'Market' in listing:
+            listing = listing[listing['Market'] == market].reset_index(drop=True)
+        return listing
+
+    def daily(self, code, start=None, end=None):
+        path = self._daily_path(code)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume', 'Change'])
+        df = pd.read_csv(path, index_col='Date', parse_dates=['Date'])
+        if start is not None:
+            df = df[df.index >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df.index <= pd.Timestamp(end)]
+        return df
+
+    def save_listing(self, listing):
+        os.makedirs(self.root, exist_ok=True)
+        listing.to_csv(os.path.join(self.root, 'listing.csv'), index=False)
+
+    def save_daily(self, code, df):
+        os.makedirs(os.path.dirname(self._daily_path(code)), exist_ok=True)
+        tmp = self._daily_path(code) + '.tmp'
+        df.rename_axis('Date').to_csv(tmp)
+        os.replace(tmp, self._daily_path(code))
+
+
+class ConcurrentFetcher:
+    # 여러 종목 일봉을 동시에 받는다. 같은 스레드 풀을 재사용하고, 속도 제한/재시도는 소스가 맡는다.
+    # source 는 source(code, start=..., end=...) 로 부를 수 있으면 무엇이든 된다
+    # (DataSource, OHLCVStore, 종목별 작업 함수)
+    def __init__(self, source=None, max_workers=FETCH_WORKERS):
+        self.source = source or default_source()
+        self.max_workers = max_workers
+        self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fetch')
+        return self._pool
+
+    def fetch_many(self, codes, start=None, end=None, max_in_flight=None):
+        # (종목코드, 일봉 또는 예외) 를 완료 순서대로 내보내는 생성기.
+        # 제출해 둔 요청을 max_in_flight 개(기본 max_workers * 2)로 제한하고, 하나를 내보낼 때마다
+        # 다음 종목을 제출하므로 받은 결과가 소비되지 않고 쌓이지 않는다
+        pool = self._executor()
+        limit = max_in_flight or self.max_workers * 2
+        todo = iter(dict.fromkeys(codes))
+        pending = {}
+
+        def submit(n):
+            for code in todo:
+                pending[pool.submit(self.source, code, start=start, end=end)] = code
+                if len(pending) >= n:
+                    break
+
+        submit(limit)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            results = [(pending.pop(future), future) for future in done]
+            submit(limit)
+            for code, future in results:
+                try:
+                    yield code, future.result()
+                except Exception as exc:
+                    yield code, exc
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_default_source = None
+
+
+def default_source():
+    # MARKET_DATA_DIR 이 있으면 로컬 파일, 없으면 FinanceDataReader (프로세스당 하나)
+    global _default_source
+    if _default_source is None:
+        _default_source = LocalSource(MARKET_DATA_DIR) if MARKET_DATA_DIR else FdrSource()
+    return _default_source
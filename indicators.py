@@ -0,0 +1,68 @@
+import numpy as np
+
+import telemetry
+
+# --------------------------------------------------------------------------
+# 📐 주간 지표 계산 (app.py / app2.py 공통)
+# --------------------------------------------------------------------------
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+WEEKLY_AGG = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+def clean_daily(df):
+    # 결측치 및 가격이 0인 행(거래정지 등) 제거
+    df = df[OHLCV_COLUMNS].dropna()
+    return df[df[['Open', 'High', 'Low', 'Close']].ne(0).all(axis=1)]
+
+
+def to_weekly(df):
+    # 금요일 기준 주봉으로 변환
+    return df.resample('W-FRI').agg(WEEKLY_AGG).dropna()
+
+
+def add_signals(weekly):
+    # MA10 / CMF 기반 매수·매도 신호
+    weekly['Prev_High'] = weekly['High'].shift(1)
+    weekly['Prev_Low'] = weekly['Low'].shift(1)
+    weekly['MA10'] = weekly['Close'].rolling(window=10).mean()
+    mf_multiplier = ((weekly['Close'] - weekly['Low']) - (weekly['High'] - weekly['Close'])) / (
+                weekly['High'] - weekly['Low'])
+    mf_volume = mf_multiplier * weekly['Volume']
+    weekly['CMF'] = mf_volume.rolling(window=4).sum() / weekly['Volume'].rolling(window=4).sum()
+    weekly['BuySignal'] = 0
+    weekly['SellSignal'] = 0
+    weekly.loc[(weekly['High'] > weekly['Prev_High']) & (weekly['Close'] > weekly['MA10']) & (
+                weekly['CMF'] > 0), 'BuySignal'] = 1
+    weekly.loc[(weekly['Low'] < weekly['Prev_Low']) & (weekly['Close'] < weekly['MA10']) & (
+                weekly['CMF'] < 0), 'SellSignal'] = 1
+    return weekly
+
+
+def add_fear_greed(weekly):
+    # Fear & Greed 지수 (모멘텀 / 52주 위치 / 거래량 급증 / 변동성 급등)
+    weekly['Momentum5'] = (np.log(weekly['Close']) - np.log(weekly['Close'].shift(5))) * 100
+    rolling_low = weekly['Close'].rolling(window=52, min_periods=1).min()
+    rolling_high = weekly['Close'].rolling(window=52, min_periods=1).max()
+    weekly['Position52W'] = ((weekly['Close'] - rolling_low) / (rolling_high - rolling_low)).clip(0, 1)
+    recent_vol_avg = weekly['Volume'].rolling(window=5, min_periods=1).mean()
+    past_vol_avg = weekly['Volume'].rolling(window=20, min_periods=1).mean()
+    weekly['VolumeSurge'] = (recent_vol_avg / past_vol_avg).clip(0, 3)
+    weekly_return = weekly['Close'].pct_change()
+    recent_vol = weekly_return.rolling(window=5, min_periods=1).std()
+    past_vol = weekly_return.rolling(window=20, min_periods=1).std()
+    weekly['VolatilitySpike'] = (recent_vol / past_vol).clip(0, 3)
+    momentum_score = (weekly['Momentum5'].rolling(window=7, min_periods=1).mean() / 10).clip(-1, 1.5)
+    position_score = (2 * weekly['Position52W'].rolling(window=7, min_periods=1).mean() - 1).clip(-1, 1.5)
+    volume_score = (weekly['VolumeSurge'].rolling(window=10, min_periods=1).mean() - 1).clip(-0.5, 1.2)
+    volatility_score = -(weekly['VolatilitySpike'].rolling(window=10, min_periods=1).mean() - 1).clip(-0.5, 1.2)
+    weekly['FearGreedScore'] = (
+                0.45 * momentum_score + 0.45 * position_score + 0.05 * volume_score + 0.05 * volatility_score)
+    return weekly
+
+
+def compute_weekly(df):
+    # 일봉 → 정제 → 주봉 → 신호 → F&G 지수
+    with telemetry.span('resample'):
+        weekly = to_weekly(clean_daily(df))
+    with telemetry.span('indicators'):
+        return add_fear_greed(add_signals(weekly))
@@ -0,0 +1,188 @@
+import argparse
+import itertools
+import sys
+import warnings
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from backtest import signal_triggers, resolve_positions, batch_trade_returns, batch_summary, evaluate_chunks
+from indicators import add_fear_greed, clean_daily, to_weekly
+
+# --------------------------------------------------------------------------
+# 🔧 파라미터 스윕 (MA / CMF / Fear & Greed 전략)
+# --------------------------------------------------------------------------
+# 창 크기별 지표를 (파라미터 × 주) 배열로 한 번에 계산해 두고, 조합은 그 배열의 인덱스로만
+# 표현한다. 조합 묶음(chunk)마다 매수/매도 신호 → 보유 상태 → 거래 수익률을 2차원 배열
+# 연산으로 처리하며, 묶음은 프로세스 풀로 나누어 평가한다.
+#
+# 기본 전략에서 F&G 지수는 표시용이라 가중치/클립 범위가 거래에 영향을 주지 않으므로,
+# 스윕에서는 'F&G 지수가 fg_buy_max 이하일 때만 매수' 조건을 함께 탐색한다.
+# (fg_buy_max=inf 이면 조건 없음 = 기존 전략)
+#
+# 명령줄: python optimizer.py 005930 [--start 2015-01-01] [--original] [--top 20] [--out sweep.csv]
+DEFAULT_PARAMS = {
+    'ma_window': 10,
+    'cmf_window': 4,
+    'position_window': 52,
+    'weights': (0.45, 0.45, 0.05, 0.05),  # 모멘텀, 52주 위치, 거래량, 변동성
+    'clips': ((-1, 1.5), (-1, 1.5), (-0.5, 1.2), (-0.5, 1.2)),
+    'fg_buy_max': np.inf,
+}
+
+DEFAULT_GRID = {
+    'ma_window': list(range(5, 31)),
+    'cmf_window': list(range(2, 13)),
+    'position_window': [26, 52, 104],
+    'weights': [DEFAULT_PARAMS['weights']],
+    'clips': [DEFAULT_PARAMS['clips']],
+    'fg_buy_max': [np.inf, 1.0, 0.5, 0.0],
+}
+
+CHUNK_SIZE = 2000
+
+
+def _windowed(values, window, pad):
+    # (T,) → (T, window) 보기 (앞쪽은 pad 로 채움)
+    padded = np.concatenate([np.full(window - 1, pad), values])
+    return sliding_window_view(padded, window)
+
+
+def _rolling_full(values, window, func):
+    # rolling(window).<func>() — 창 안에 NaN 이 있거나 창이 덜 찼으면 NaN
+    return func(_windowed(values, window, np.nan), axis=-1)
+
+
+def _rolling_nan(values, window, func):
+    # rolling(window, min_periods=1).<func>() — NaN 은 건너뜀
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return func(_windowed(values, window, np.nan), axis=-1)
+
+
+# --------------------------------------------------------------------------
+# 📐 창 크기별 지표 배열 (한 번만 계산)
+# --------------------------------------------------------------------------
+def build_context(weekly, grid):
+    o, h, l, c, v = (weekly[col].to_numpy(dtype='f8') for col in ['Open', 'High', 'Low', 'Close', 'Volume'])
+    prev_h = np.r_[np.nan, h[:-1]]
+    prev_l = np.r_[np.nan, l[:-1]]
+
+    ma = np.stack([_rolling_full(c, w, np.sum) / w for w in grid['ma_window']])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mf_volume = ((c - l) - (h - c)) / (h - l) * v
+        cmf = np.stack([_rolling_full(mf_volume, w, np.sum) / _rolling_full(v, w, np.sum)
+                        for w in grid['cmf_window']])
+
+    # 창 크기와 무관한 F&G 구성요소는 기존 계산을 그대로 사용
+    fixed = add_fear_greed(weekly[['Open', 'High', 'Low', 'Close', 'Volume']].copy())
+    momentum = _rolling_nan(fixed['Momentum5'].to_numpy(), 7, np.nanmean) / 10
+    surge = _rolling_nan(fixed['VolumeSurge'].to_numpy(), 10, np.nanmean) - 1
+    spike = _rolling_nan(fixed['VolatilitySpike'].to_numpy(), 10, np.nanmean) - 1
+    positions = []
+    for w in grid['position_window']:
+        low, high = _rolling_nan(c, w, np.nanmin), _rolling_nan(c, w, np.nanmax)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            raw = np.clip((c - low) / (high - low), 0, 1)
+        positions.append(2 * _rolling_nan(raw, 7, np.nanmean) - 1)
+    position = np.stack(positions)
+
+    # fear_greed[위치 창, (가중치, 클립) 조합, 주]
+    weight_clips = list(itertools.product(grid['weights'], grid['clips']))
+    fear_greed = np.empty((len(position), len(weight_clips), len(c)))
+    for k, (weights, clips) in enumerate(weight_clips):
+        fear_greed[:, k] = (weights[0] * np.clip(momentum, *clips[0]) + weights[1] * np.clip(position, *clips[1])
+                            + weights[2] * np.clip(surge, *clips[2]) - weights[3] * np.clip(spike, *clips[3]))
+
+    return {
+        'open': o, 'close': c,
+        'high_break': h > prev_h, 'low_break': l < prev_l,
+        'above_ma': c > ma, 'below_ma': c < ma,
+        'cmf_pos': cmf > 0, 'cmf_neg': cmf < 0,
+        'fear_greed': fear_greed,
+    }
+
+
+def _evaluate(ctx, idx, revised):
+    ma_i, cmf_i, pos_i, wc_i, fg_max = idx
+    buy = ctx['high_break'] & ctx['above_ma'][ma_i] & ctx['cmf_pos'][cmf_i]
+    sell = ctx['low_break'] & ctx['below_ma'][ma_i] & ctx['cmf_neg'][cmf_i]
+    gated = np.isfinite(fg_max)
+    if gated.any():
+        gate = ctx['fear_greed'][pos_i[gated], wc_i[gated]] <= fg_max[gated, None]
+        buy[gated] &= gate
+
+    buy, sell = signal_triggers(buy, sell, revised)
+    position = resolve_positions(buy, sell)
+    exit_price = ctx['open'] if revised else ctx['close']
+    rows, returns = batch_trade_returns(position, ctx['open'], exit_price)
+    return batch_summary(rows, returns, len(ma_i))
+
+
+# --------------------------------------------------------------------------
+# 🚀 스윕 실행
+# --------------------------------------------------------------------------
+def parameter_grid(grid=None):
+    grid = {**DEFAULT_GRID, **(grid or {})}
+    combos = pd.DataFrame(list(itertools.product(*grid.values())), columns=list(grid))
+    return grid, combos
+
+
+def sweep(weekly, grid=None, revised=True, workers=None, chunk_size=CHUNK_SIZE):
+    # weekly: 주봉 OHLCV (indicators.to_weekly 결과)
+    # 반환: 조합별 total_trades / avg_return / cum_return / win_rate (누적 수익률 내림차순)
+    grid, combos = parameter_grid(grid)
+    ctx = build_context(weekly, grid)
+
+    n_clips = len(grid['clips'])
+    index = (
+        combos['ma_window'].map({w: i for i, w in enumerate(grid['ma_window'])}).to_numpy(),
+        combos['cmf_window'].map({w: i for i, w in enumerate(grid['cmf_window'])}).to_numpy(),
+        combos['position_window'].map({w: i for i, w in enumerate(grid['position_window'])}).to_numpy(),
+        np.array([grid['weights'].index(w) * n_clips + grid['clips'].index(c)
+                  for w, c in zip(combos['weights'], combos['clips'])], dtype=np.intp),
+        combos['fg_buy_max'].to_numpy(dtype='f8'),
+    )
+    chunks = [tuple(arr[i:i + chunk_size] for arr in index) for i in range(0, len(combos), chunk_size)]
+    results = evaluate_chunks(_evaluate, ctx, [(chunk, revised) for chunk in chunks], workers)
+
+    for key in ['total_trades', 'avg_return', 'cum_return', 'win_rate']:
+        combos[key] = np.concatenate([r[key] for r in results]) if results else []
+    return combos.sort_values('cum_return', ascending=False, ignore_index=True)
+
+
+def main(argv=None):
+    from datasource import default_source
+    from store import OHLCVStore, market_today
+
+    parser = argparse.ArgumentParser(description='종목 하나에 대해 기본 그리드로 파라미터 스윕')
+    parser.add_argument('code', help='종목코드')
+    parser.add_argument('--start', type=date.fromisoformat, default=market_today() - timedelta(days=10 * 365))
+    parser.add_argument('--end', type=date.fromisoformat, default=market_today())
+    parser.add_argument('--original', action='store_true', help='기존 방식 (신호 봉 체결, 기본은 다음 봉 시가 체결)')
+    parser.add_argument('--top', type=int, default=20, help='출력할 상위 조합 수')
+    parser.add_argument('--workers', type=int, default=None, help='프로세스 수 (기본: CPU 수, 1 이면 단일 프로세스)')
+    parser.add_argument('--store', nargs='?', const='', default=None,
+                        help='로컬 OHLCV 저장소 사용 (경로 생략 시 기본 위치)')
+    parser.add_argument('--out', help='전체 결과를 저장할 .csv 파일')
+    args = parser.parse_args(argv)
+
+    loader = default_source()
+    if args.store is not None:
+        loader = OHLCVStore(args.store) if args.store else OHLCVStore()
+    df = loader(args.code, start=args.start, end=args.end)
+    if df is None or df.empty:
+        print(f'no data: {args.code}', file=sys.stderr)
+        return 1
+
+    result = sweep(to_weekly(clean_daily(df)), revised=not args.original, workers=args.workers)
+    if args.out:
+        result.to_csv(args.out, index=False)
+    print(result.drop(columns=['weights', 'clips']).head(args.top).to_string(index=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
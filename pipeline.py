@@ -0,0 +1,166 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import telemetry
+from backtest import run_backtest
+from indicators import compute_weekly
+from store import OHLCVStore, market_today, refresh_token
+
+# --------------------------------------------------------------------------
+# 🧩 분석 파이프라인 (일봉 로드 → 주봉 지표 → 백테스트) + 단계별 메모이제이션
+# --------------------------------------------------------------------------
+# app.py / app2.py 가 공유하는 순수 함수 모음. 각 단계 결과는 (종목, 기간, 파라미터) 키로
+# 메모리 상한이 있는 LRU 캐시에 저장한다.
+#  - 일봉: (종목, 종료일) 단위로 가장 넓은 구간만 보관하고, 더 늦은 시작일 요청은 잘라서 재사용
+#  - 주봉 지표 / 백테스트: (종목, 시작일, 종료일[, 방식]) 단위
+#    MA10·CMF·52주 위치 등 롤링 창과 첫 봉 무시 규칙이 시작일에 따라 값이 달라지므로
+#    (앞쪽 이력이 다르면 같은 날짜의 지표도 다르다) 시작일이 다른 요청끼리는 공유하지 않는다
+#  - 종료일이 오늘이면 장중에는 저장소 재동기화 주기마다 키가 바뀌어 가격이 갱신되고,
+#    장 마감 후에는 다음 개장까지 키가 고정된다 (store.refresh_token, '오늘'은 한국 시간 기준)
+# 키에는 로더 객체도 들어간다 (다른 저장소 / 소스로 읽은 같은 종목·기간을 섞지 않도록, None 은 default_loader()).
+# 캐시된 DataFrame 을 호출자가 수정해도 안전하도록 항상 복사본을 돌려준다.
+CACHE_MAX_BYTES = int(os.environ.get('PIPELINE_CACHE_MB', '256')) * 1024 * 1024
+
+
+def _nbytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()  # key → (value, nbytes)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value):
+        size = _nbytes(value)
+        with self._lock:
+            if key in self._items:
+                self.total_bytes -= self._items.pop(key)[1]
+            if size > self.max_bytes:
+                return value
+            self._items[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.total_bytes -= evicted
+        return value
+
+    def get_or_compute(self, key, compute, name=None):
+        # name: 계측용 캐시 이름 (telemetry 적중/미스 카운터)
+        value = self.get(key, _MISSING)
+        if name:
+            telemetry.count(name, value is not _MISSING)
+        if value is _MISSING:
+            value = self.put(key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+
+_MISSING = object()
+cache = LRUCache()
+
+_default_store = None
+
+
+def default_loader():
+    global _default_store
+    if _default_store is None:
+        _default_store = OHLCVStore()
+    return _default_store
+
+
+def _day(value):
+    return pd.Timestamp(value or market_today()).date()
+
+
+def _end_key(end):
+    return (end, refresh_token()) if end >= market_today() else (end, None)
+
+
+# --------------------------------------------------------------------------
+# 1) 일봉 로드
+# --------------------------------------------------------------------------
+def load_daily(code, start, end=None, loader=None):
+    start, end, loader = _day(start), _day(end), loader or default_loader()
+    key = ('daily', loader, code, _end_key(end))
+    cached = cache.get(key)
+    hit = cached is not None and cached[0] <= start
+    telemetry.count('pipeline.daily', hit)
+    if hit:
+        df = cached[1]
+    else:
+        with telemetry.span('load_daily'):
+            df = loader(code, start=start, end=end)
+        cache.put(key, (start, df))
+    return df[df.index >= pd.Timestamp(start)].copy()
+
+
+# --------------------------------------------------------------------------
+# 2) 주봉 + 신호 + Fear & Greed 지수
+# --------------------------------------------------------------------------
+def _weekly(code, start, end, loader):
+    def compute():
+        df = load_daily(code, start, end, loader)
+        return compute_weekly(df) if not df.empty else pd.DataFrame()
+    return cache.get_or_compute(('weekly', loader, code, start, _end_key(end)), compute, name='pipeline.weekly')
+
+
+def weekly_indicators(code, start, end=None, loader=None):
+    return _weekly(code, _day(start), _day(end), loader or default_loader()).copy()
+
+
+# --------------------------------------------------------------------------
+# 3) 백테스트 (revised=False: 기존 방식, True: 다음 봉 체결)
+# --------------------------------------------------------------------------
+def backtest(code, start, end=None, revised=False, loader=None):
+    start, end, loader = _day(start), _day(end), loader or default_loader()
+
+    def compute():
+        weekly = _weekly(code, start, end, loader)
+        if weekly.empty:
+            return None
+        with telemetry.span('backtest.revised' if revised else 'backtest.original'):
+            return run_backtest(weekly, revised)
+
+    result = cache.get_or_compute(('backtest', loader, code, start, _end_key(end), revised), compute,
+                                  name='pipeline.backtest')
+    if result is None:
+        return None
+    bt_df, summary, actual_sell = result
+    return bt_df.copy(), dict(summary), actual_sell.copy()
@@ -0,0 +1,231 @@
+import argparse
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+import pipeline
+from backtest import signal_triggers, resolve_positions
+
+# --------------------------------------------------------------------------
+# 🧺 다종목 포트폴리오 백테스트 (주 × 종목 행렬)
+# --------------------------------------------------------------------------
+# 여러 종목의 주봉을 같은 날짜축의 (주 × 종목) 행렬로 맞춘 뒤, 종목별 매수/매도 신호 →
+# 보유 여부를 전 종목에 대해 한 번에 계산한다 (수정된 방식: 전 주 신호로 이번 주 시가 체결).
+# 동시 보유 종목 수(max_positions) 제한 때문에 '어느 종목을 살지'는 경로에 따라 달라지므로
+# 주 단위 루프로 고르되, 루프 안의 연산은 모두 종목 축 벡터 연산이다.
+#  - 이미 보유 중인 종목이 우선, 빈 자리는 이번 주 진입 신호가 난 종목 중 F&G 지수가
+#    낮은(공포) 순으로 채운다
+#  - 비중: 'equal' 은 자리당 1/max_positions, 'fear_greed' 는 진입 시점 F&G 지수가 낮을수록
+#    크게 (투자 비율은 equal 과 같고 보유 종목 사이 배분만 다름)
+#  - 수익률: t 주 시가 → t+1 주 시가 구간 (마지막 주는 시가에 전량 청산)
+# 거래정지 등으로 빠진 주는 가격을 앞 값으로 채우고 그 주에는 체결하지 않는다.
+# 전 종목처럼 큰 묶음은 compact.write_universe 로 저장해 두고 align_universe 로 행렬을 바로 만든다.
+#
+# 명령줄: python portfolio.py --tickers 005930 000660 035420 [--max-positions 2] [--weighting fear_greed]
+#                             [--fee-rate 0.003] [--out curve.csv]
+#         python portfolio.py --universe <compact 디렉터리> [--tickers ...]   # 저장된 압축 주봉 전체 (기간 = 저장 범위)
+WEIGHTINGS = ('equal', 'fear_greed')
+FG_CEILING = 1.5   # F&G 지수 상한 (clip 범위의 최댓값) → 비중 = FG_CEILING - 진입 시 F&G
+FG_MIN_WEIGHT = 0.1
+
+
+def load_weeklies(codes, start, end=None, loader=None):
+    # 종목별 주봉 지표 (파이프라인 캐시 공유, 데이터 없는 종목 제외)
+    weeklies = {}
+    for code in codes:
+        weekly = pipeline.weekly_indicators(code, start, end, loader=loader)
+        if not weekly.empty:
+            weeklies[code] = weekly
+    return weeklies
+
+
+def align_weekly(weeklies):
+    # weeklies: {종목코드: 신호가 계산된 주봉} → 같은 날짜축/종목 순서의 행렬 묶음
+    codes = list(weeklies)
+    dates = pd.DatetimeIndex(sorted(set().union(*(w.index for w in weeklies.values()))))
+
+    def matrix(col, fill=np.nan):
+        frame = pd.DataFrame({code: weeklies[code][col] for code in codes}).reindex(dates)
+        return frame.to_numpy(dtype='f8', na_value=fill)
+
+    available = pd.DataFrame({code: pd.Series(True, index=weeklies[code].index) for code in codes}).reindex(dates)
+    return {
+        'dates': dates,
+        'codes': codes,
+        'available': available.notna().to_numpy(),
+        'open': pd.DataFrame(matrix('Open')).ffill().to_numpy(),
+        'buy': matrix('BuySignal', 0) == 1,
+        'sell': matrix('SellSignal', 0) == 1,
+        'fear_greed': matrix('FearGreedScore'),
+    }
+
+
+def align_universe(universe, codes=None):
+    # compact.CompactUniverse 의 memmap 컬럼과 신호 비트맵에서 바로 align_weekly() 와 같은 행렬 묶음을 만든다
+    # (종목별 DataFrame 을 거치지 않는다. 기간은 저장된 범위, 가격·F&G 는 저장된 float32 값)
+    codes = list(universe.codes if codes is None else codes)
+    days = [universe.column(code, 'Date') for code in codes]
+    dates = np.unique(np.concatenate(days)) if days else np.zeros(0, dtype='<i4')
+    shape = (len(dates), len(codes))
+    available = np.zeros(shape, dtype=bool)
+    buy, sell = np.zeros(shape, dtype=bool), np.zeros(shape, dtype=bool)
+    opens, fear_greed = np.full(shape, np.nan), np.full(shape, np.nan)
+    for j, code in enumerate(codes):
+        rows = np.searchsorted(dates, days[j])
+        available[rows, j] = True
+        opens[rows, j] = universe.column(code, 'Open')
+        fear_greed[rows, j] = universe.column(code, 'FearGreedScore')
+        buy[rows, j] = universe.signal(code, 'BuySignal')
+        sell[rows, j] = universe.signal(code, 'SellSignal')
+    return {
+        'dates': pd.DatetimeIndex(dates.astype('datetime64[D]').astype('datetime64[ns]')),
+        'codes': codes,
+        'available': available,
+        'open': pd.DataFrame(opens).ffill().to_numpy(),
+        'buy': buy,
+        'sell': sell,
+        'fear_greed': fear_greed,
+    }
+
+
+def _select_positions(desired, entries, priority, max_positions):
+    # 주 단위로 보유 종목 확정 (종목 축 벡터 연산)
+    n_weeks, n_tickers = desired.shape
+    held = np.zeros(n_tickers, dtype=bool)
+    holdings = np.zeros((n_weeks, n_tickers), dtype=bool)
+    for t in range(n_weeks):
+        held &= desired[t]
+        candidates = np.flatnonzero(entries[t] & ~held)
+        free = max_positions - int(held.sum())
+        if len(candidates) and free > 0:
+            if len(candidates) > free:
+                candidates = candidates[np.argsort(priority[t, candidates], kind='stable')[:free]]
+            held[candidates] = True
+        holdings[t] = held
+    return holdings
+
+
+def _target_weights(holdings, entries, fear_greed, max_positions, weighting):
+    if weighting == 'equal':
+        return holdings / max_positions
+    # 진입 주의 F&G 지수를 보유 기간 내내 유지 (매주 비중이 흔들리지 않도록)
+    fg_at_entry = pd.DataFrame(np.where(entries & holdings, fear_greed, np.nan)).ffill().to_numpy()
+    raw = np.where(holdings, np.clip(FG_CEILING - np.nan_to_num(fg_at_entry, nan=0.0), FG_MIN_WEIGHT, None), 0.0)
+    total = raw.sum(axis=1, keepdims=True)
+    invested = holdings.sum(axis=1, keepdims=True) / max_positions
+    return np.divide(raw * invested, total, out=np.zeros_like(raw), where=total > 0)
+
+
+def run_portfolio(weeklies, max_positions=10, weighting='equal', fee_rate=0.0):
+    # weeklies: {종목코드: 주봉} 또는 align_weekly() / align_universe() 결과
+    # 반환: (주별 곡선 DataFrame, 주별 비중 DataFrame, 요약 dict)
+    if weighting not in WEIGHTINGS:
+        raise ValueError(f'weighting must be one of {WEIGHTINGS}')
+    data = weeklies if 'dates' in weeklies else align_weekly(weeklies)
+    available = data['available']
+
+    # 종목별 보유 신호 (backtest 함수는 마지막 축이 시간이므로 전치해서 넘긴다)
+    buy, sell = signal_triggers(data['buy'].T, data['sell'].T, revised=True)
+    desired = resolve_positions(buy & available.T, sell & available.T).T
+    # 상장폐지 등으로 데이터가 끝난 종목, 그리고 마지막 주에는 시가에 청산
+    listed = np.flip(np.logical_or.accumulate(np.flip(available, axis=0), axis=0), axis=0)
+    desired &= np.vstack([listed[1:], np.zeros_like(listed[:1])])
+    prev = np.vstack([np.zeros_like(desired[:1]), desired[:-1]])
+    entries = desired & ~prev
+
+    priority = np.where(np.isnan(data['fear_greed']), np.inf, data['fear_greed'])
+    holdings = _select_positions(desired, entries, priority, max_positions)
+    weights = _target_weights(holdings, entries, data['fear_greed'], max_positions, weighting)
+
+    # t 주 시가 → t+1 주 시가 수익률 (마지막 주는 0)
+    opens = data['open']
+    asset_returns = np.zeros_like(opens)
+    asset_returns[:-1] = np.nan_to_num(opens[1:] / opens[:-1] - 1)
+    gross = (weights * asset_returns).sum(axis=1)
+
+    # 회전율: 지난주 비중이 가격 변화로 흘러간 뒤, 이번 주 목표 비중으로 맞추는 데 필요한 매매량
+    drifted = np.zeros_like(weights)
+    drifted[1:] = weights[:-1] * (1 + asset_returns[:-1]) / (1 + gross[:-1, None])
+    turnover = np.abs(weights - drifted).sum(axis=1)
+    net = gross - fee_rate * turnover
+
+    equity = np.cumprod(1 + net)
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+    curve = pd.DataFrame({
+        'Return': net,
+        'Equity': equity,
+        'Drawdown': drawdown,
+        'Turnover': turnover,
+        'Positions': holdings.sum(axis=1),
+        'Exposure': weights.sum(axis=1),
+    }, index=data['dates'])
+    weights = pd.DataFrame(weights, index=data['dates'], columns=data['codes'])
+
+    years = max((data['dates'][-1] - data['dates'][0]).days / 365.25, 1 / 52) if len(data['dates']) else 1
+    summary = {
+        'cum_return': float(equity[-1] - 1) if len(equity) else 0,
+        'cagr': float(equity[-1] ** (1 / years) - 1) if len(equity) else 0,
+        'max_drawdown': float(drawdown.min()) if len(drawdown) else 0,
+        'avg_turnover': float(turnover.mean()) if len(turnover) else 0,
+        'avg_positions': float(holdings.sum(axis=1).mean()) if len(holdings) else 0,
+        'total_entries': int((holdings & ~np.vstack([np.zeros_like(holdings[:1]), holdings[:-1]])).sum()),
+    }
+    return curve, weights, summary
+
+
+def main(argv=None):
+    from batch import read_tickers_file, resolve_codes
+    from datasource import default_source
+    from store import OHLCVStore, market_today
+
+    parser = argparse.ArgumentParser(description='여러 종목 포트폴리오 백테스트 (전 주 신호 → 이번 주 시가 체결)')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--tickers', nargs='+', help='종목코드 또는 종목명')
+    target.add_argument('--tickers-file', help='한 줄에 종목 하나씩 적힌 파일')
+    parser.add_argument('--universe', help='compact.write_universe 로 저장한 디렉터리 (종목 생략 시 전 종목)')
+    parser.add_argument('--start', type=date.fromisoformat, default=market_today() - timedelta(days=10 * 365))
+    parser.add_argument('--end', type=date.fromisoformat, default=market_today())
+    parser.add_argument('--max-positions', type=int, default=10, help='동시 보유 종목 수')
+    parser.add_argument('--weighting', choices=WEIGHTINGS, default='equal')
+    parser.add_argument('--fee-rate', type=float, default=0.0, help='회전율당 비용 (0.003 = 0.3%%)')
+    parser.add_argument('--store', nargs='?', const='', default=None,
+                        help='로컬 OHLCV 저장소 사용 (경로 생략 시 기본 위치)')
+    parser.add_argument('--out', help='주별 곡선(수익률/자산/낙폭/회전율)을 저장할 .csv 파일')
+    args = parser.parse_args(argv)
+    tickers = read_tickers_file(args.tickers_file) if args.tickers_file else args.tickers
+    if tickers is None and args.universe is None:
+        parser.error('one of --tickers / --tickers-file / --universe is required')
+
+    if args.universe:
+        # 압축 주봉의 memmap 컬럼 / 신호 비트맵에서 바로 행렬을 만든다 (종목별 DataFrame 없음)
+        from compact import CompactUniverse
+
+        universe = CompactUniverse(args.universe)
+        codes = universe.codes if tickers is None else tickers
+        loaded = [code for code in codes if code in universe]
+        data = align_universe(universe, loaded)
+    else:
+        loader = default_source()
+        codes = resolve_codes(tickers, loader.listing('KRX'))
+        if args.store is not None:
+            loader = OHLCVStore(args.store) if args.store else OHLCVStore()
+        data = load_weeklies(codes, args.start, args.end, loader=loader)
+        loaded = list(data)
+    for code in codes:
+        if code not in loaded:
+            print(f'skip {code}: no data', file=sys.stderr)
+    if not loaded:
+        print('no data', file=sys.stderr)
+        return 1
+    curve, _, summary = run_portfolio(data, args.max_positions, args.weighting, args.fee_rate)
+    if args.out:
+        curve.to_csv(args.out)
+    for key, value in summary.items():
+        print(f'{key:<14} {value:,.4f}' if isinstance(value, float) else f'{key:<14} {value}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pipeline
+import scanner
+from datasource import ConcurrentFetcher
+from search import POPULAR_STOCKS
+from store import KST, MARKET_CLOSE, MARKET_OPEN, REFRESH_SECONDS, is_market_open, market_today
+
+# --------------------------------------------------------------------------
+# 🔥 백그라운드 캐시 예열 (인기 종목 + 관심 종목)
+# --------------------------------------------------------------------------
+# 서버 시작 시, 장중에는 파이프라인 캐시 키가 바뀌는 REFRESH_SECONDS 경계마다, 그리고 장 마감 후
+# 한 번 인기/관심 종목의 일봉을 받아 파이프라인 캐시(주봉 지표 + 두 가지 백테스트)를 미리 채운다.
+# 장 마감 후 채운 항목은 다음 개장까지 키가 바뀌지 않으므로 저녁·새벽 요청도 그대로 쓴다
+# (종료일·기본 시작일의 '오늘'은 서버 시간대와 무관하게 평일 개장 시각에 넘어가는 store.market_today()).
+#  - 다운로드가 대부분인 I/O 작업이므로 ConcurrentFetcher 스레드로 동시 실행 수를 제한해 처리
+#  - 데몬 스레드에서 돌기 때문에 Streamlit 스크립트 스레드를 막지 않는다
+#  - loader 가 OHLCVStore 이면 장 밖에서 돌 때 전 종목 시세 스냅샷을 그날의 확정 봉으로 기록해
+#    (scanner.record_session) 다음 거래일 시장 스캔이 종목별로 다시 받지 않게 한다
+# 관심 종목은 WATCHLIST 환경 변수에 종목명 또는 종목코드를 쉼표로 구분해 넣는다.
+PREFETCH_WORKERS = int(os.environ.get('PREFETCH_WORKERS', '4'))
+DEFAULT_LOOKBACK_DAYS = 3 * 365  # 앱의 기본 분석 시작일 (app.py / app2.py 가 import 해서 같은 캐시 키를 쓴다)
+
+logger = logging.getLogger(__name__)
+
+
+def watchlist_from_env():
+    return [s.strip() for s in os.environ.get('WATCHLIST', '').split(',') if s.strip()]
+
+
+def _next_weekday_at(clock, now=None):
+    now = now or datetime.now(KST)
+    target = datetime.combine(now.date(), clock, tzinfo=KST)
+    if now >= target:
+        target += timedelta(days=1)
+    while target.weekday() >= 5:  # 주말 건너뛰기
+        target += timedelta(days=1)
+    return target
+
+
+def next_market_close(now=None):
+    return _next_weekday_at(MARKET_CLOSE, now)
+
+
+def next_warm_time(now=None):
+    # 다음 예열 시각: 장중에는 다음 갱신 경계(또는 장 마감), 장 밖에서는 다음 개장 또는 장 마감
+    now = now or datetime.now(KST)
+    close = next_market_close(now)
+    if is_market_open(now):
+        boundary = datetime.fromtimestamp((now.timestamp() // REFRESH_SECONDS + 1) * REFRESH_SECONDS, KST)
+        return min(boundary, close)
+    return min(_next_weekday_at(MARKET_OPEN, now), close)
+
+
+class Prefetcher:
+    def __init__(self, ticker_index, loader=None, watchlist=None, max_workers=PREFETCH_WORKERS,
+                 lookback_days=DEFAULT_LOOKBACK_DAYS):
+        self.ticker_index = ticker_index
+        self.loader = loader
+        self.watchlist = watchlist if watchlist is not None else watchlist_from_env()
+        self.max_workers = max_workers
+        self.lookback_days = lookback_days
+        self.last_run = None
+        self.last_errors = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def codes(self):
+        # 종목명/종목코드를 코드로 통일 (중복·알 수 없는 항목 제외, 순서 유지)
+        codes = []
+        for item in POPULAR_STOCKS + self.watchlist:
+            code = item if self.ticker_index.name(item) else self.ticker_index.code(item)
+            if code and code not in codes:
+                codes.append(code)
+        return codes
+
+    def _warm_one(self, code, start, end):
+        pipeline.weekly_indicators(code, start, end, loader=self.loader)
+        pipeline.backtest(code, start, end, revised=False, loader=self.loader)
+        pipeline.backtest(code, start, end, revised=True, loader=self.loader)
+
+    def warm(self):
+        end = market_today()
+        start = end - timedelta(days=self.lookback_days)
+        errors = {}
+        # 종목별 예열 함수를 소스 자리에 넘긴다 (다운로드 속도 제한은 loader 의 소스가 맡는다)
+        with ConcurrentFetcher(self._warm_one, self.max_workers) as fetcher:
+            for code, result in fetcher.fetch_many(self.codes(), start, end):
+                if isinstance(result, Exception):  # 한 종목 실패가 나머지 예열을 막지 않도록
+                    errors[code] = repr(result)
+                    logger.warning('prefetch failed for %s: %r', code, result)
+        if hasattr(self.loader, 'record_session') and not is_market_open():
+            try:
+                scanner.record_session(self.loader, self.loader.reader.listing('KRX'))
+            except Exception as exc:
+                errors['record_session'] = repr(exc)
+                logger.warning('recording the market snapshot failed: %r', exc)
+        self.last_run = datetime.now(KST)
+        self.last_errors = errors
+        return errors
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.warm()
+            wait = (next_warm_time() - datetime.now(KST)).total_seconds()
+            self._stop.wait(max(wait, 0))
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='prefetch-scheduler', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+from backtest import signal_triggers, resolve_positions, trade_points, run_backtest
+
+# --------------------------------------------------------------------------
+# 🎲 몬테카를로 / 부트스트랩 강건성 분석
+# --------------------------------------------------------------------------
+# 백테스트 결과 하나(cum_return, win_rate)가 운인지 보기 위해 수익률 표본을 복원 추출로
+# 수천 번 다시 뽑아 누적 수익률 / 승률 / 최대 낙폭의 신뢰구간을 구한다.
+#  - trades: 거래별 수익률을 거래 수만큼 복원 추출 (거래 순서·구성의 운)
+#  - weekly: 전략의 주별 수익률을 block 주 단위로 이어 붙이는 원형 블록 부트스트랩
+#    (변동성 군집 같은 시계열 의존성을 블록 안에서 유지). 승률은 보유 중이던 주 기준
+# 모든 경로는 (시뮬레이션 × 표본) 인덱스 배열 하나로 한 번에 만든다. 표본이 길어도
+# 메모리가 MAX_ELEMENTS 를 넘지 않도록 시뮬레이션 축으로만 나눠 계산한다.
+N_SIMS = 10_000
+CONFIDENCE = 0.95
+MAX_ELEMENTS = 2_000_000  # 청크 하나의 (시뮬레이션 × 표본) 원소 수 (캐시에 맞는 크기가 더 빠르다)
+METRICS = ['cum_return', 'win_rate', 'max_drawdown']
+
+
+def strategy_weekly_returns(weekly, revised=True):
+    # 백테스트와 같은 체결 규칙의 주별 수익률 (보유하지 않은 주는 0).
+    # 거래 구간의 (1 + 주별 수익률) 곱이 run_backtest 의 거래 수익률과 같다.
+    buy, sell = signal_triggers(weekly['BuySignal'].to_numpy(), weekly['SellSignal'].to_numpy(), revised)
+    position = resolve_positions(buy, sell)
+    _, exits, forced = trade_points(position)
+    open_ = weekly['Open'].to_numpy(dtype='f8')
+    close = weekly['Close'].to_numpy(dtype='f8')
+
+    returns = np.zeros(len(weekly))
+    returns[:-1] = np.where(position[:-1], open_[1:] / open_[:-1] - 1, 0)
+    if not revised:
+        # 기존 방식은 청산 봉 종가에 판다 (마지막 봉 강제 청산 포함)
+        exits = exits | (np.arange(len(weekly)) == len(weekly) - 1) & forced
+        returns = np.where(exits, close / open_ - 1, returns)
+    else:
+        returns[-1] = 0  # 마지막 봉 시가에 강제 청산
+    return pd.Series(returns, index=weekly.index, name='StrategyReturn')
+
+
+def _path_metrics(samples, held_only=False):
+    # samples: (시뮬레이션 × 표본) 수익률 → 경로별 지표
+    # held_only=True 이면 승률의 분모를 수익률이 0 이 아닌(보유 중인) 표본 수로
+    equity = np.cumprod(1 + samples, axis=1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1)  # 시작 자본 1 포함
+    wins = (samples > 0).sum(axis=1)
+    counted = np.maximum((samples != 0).sum(axis=1), 1) if held_only else samples.shape[1]
+    return {
+        'cum_return': equity[:, -1] - 1,
+        'win_rate': wins / counted,
+        'max_drawdown': (equity / peak - 1).min(axis=1),
+    }
+
+
+def _simulate(values, n_sims, seed, make_index, held_only=False):
+    # make_index(rng, n_chunk) → (n_chunk × 표본) 인덱스 배열
+    rng = np.random.default_rng(seed)
+    chunk = max(1, MAX_ELEMENTS // max(len(values), 1))
+    parts = []
+    for start in range(0, n_sims, chunk):
+        parts.append(_path_metrics(values[make_index(rng, min(chunk, n_sims - start))], held_only))
+    return {key: np.concatenate([p[key] for p in parts]) for key in METRICS}
+
+
+def bootstrap_trades(trade_returns, n_sims=N_SIMS, seed=None):
+    values = np.asarray(trade_returns, dtype='f8')
+    if len(values) == 0:
+        return {key: np.zeros(n_sims) for key in METRICS}
+    return _simulate(values, n_sims, seed, lambda rng, n: rng.integers(0, len(values), (n, len(values))))
+
+
+def block_bootstrap(weekly_returns, block=4, n_sims=N_SIMS, seed=None):
+    # 원형 이동 블록 부트스트랩: 임의 시작점에서 block 주씩 이어 붙여 원래 길이로 자름
+    values = np.asarray(weekly_returns, dtype='f8')
+    n = len(values)
+    if n == 0:
+        return {key: np.zeros(n_sims) for key in METRICS}
+    n_blocks = -(-n // block)
+    offsets = np.arange(block)
+    # 끝에서 처음으로 넘어가는 블록을 나머지 연산 없이 뽑도록 앞부분을 뒤에 덧붙인다
+    wrapped = np.concatenate([values, np.resize(values, block - 1)])
+
+    def make_index(rng, size):
+        starts = rng.integers(0, n, (size, n_blocks, 1))
+        return (starts + offsets).reshape(size, n_blocks * block)[:, :n]
+
+    return _simulate(wrapped, n_sims, seed, make_index, held_only=True)
+
+
+def confidence_intervals(sims, observed, confidence=CONFIDENCE):
+    # 반환: 지표별 관측값 / 평균 / 신뢰구간 하한·중앙·상한 / 0 초과 확률
+    alpha = (1 - confidence) / 2
+    rows = {}
+    for key in METRICS:
+        values = sims[key]
+        lo, mid, hi = np.quantile(values, [alpha, 0.5, 1 - alpha])
+        rows[key] = {'observed': observed.get(key, np.nan), 'mean': values.mean(), 'lower': lo, 'median': mid,
+                     'upper': hi, 'prob_positive': (values > 0).mean()}
+    return pd.DataFrame(rows).T
+
+
+def _observed(returns, held_only=False):
+    if not len(returns):
+        return {}
+    metrics = _path_metrics(np.asarray(returns, dtype='f8')[None, :], held_only)
+    return {key: float(value[0]) for key, value in metrics.items()}
+
+
+def compare_variants(weekly, n_sims=N_SIMS, seed=0, method='trades', block=4, confidence=CONFIDENCE):
+    # 기존 방식과 수정된 방식을 같은 난수 시드로 재표본 → (방식, 지표) 인덱스의 표
+    # method: 'trades' (거래 수익률) 또는 'weekly' (주별 수익률 블록 부트스트랩)
+    if method not in ('trades', 'weekly'):
+        raise ValueError("method must be 'trades' or 'weekly'")
+    tables = {}
+    for name, revised in (('original', False), ('revised', True)):
+        if method == 'trades':
+            bt_df = run_backtest(weekly, revised)[0]
+            returns = bt_df['Return'].to_numpy() if not bt_df.empty else np.empty(0)
+            sims = bootstrap_trades(returns, n_sims, seed)
+        else:
+            returns = strategy_weekly_returns(weekly, revised).to_numpy()
+            sims = block_bootstrap(returns, block, n_sims, seed)
+        tables[name] = confidence_intervals(sims, _observed(returns, method == 'weekly'), confidence)
+    return pd.concat(tables, names=['variant', 'metric'])
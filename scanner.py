@@ -0,0 +1,181 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+
+import pandas as pd
+
+from datasource import FETCH_WORKERS, ConcurrentFetcher, default_source
+from indicators import OHLCV_COLUMNS, compute_weekly
+from store import last_market_close, market_today
+
+# --------------------------------------------------------------------------
+# 📡 전체 시장 스캐너
+# --------------------------------------------------------------------------
+# KRX 전 종목에 대해 주간 신호와 F&G 지수를 계산하고, 이번 주 매수 신호가 나온 종목을 추린다.
+# 마지막 주의 F&G 지수는 최근 58주(52주 위치 + 7주 평활)만으로 결정되므로
+# 전체 이력 대신 약 2년치만 불러와도 결과가 동일하다.
+# 일봉 다운로드는 이 프로세스의 ConcurrentFetcher(스레드 + 소스 하나의 속도 제한)가 맡고,
+# 받은 일봉을 chunk_size 개씩 묶어 프로세스 풀에서 지표를 계산한다.
+#
+# 종목마다 당일 일봉을 다시 받으면 FdrSource 속도 제한(기본 초당 5회) 때문에 2,700 종목에
+# 약 9분이 걸리고, 장중에는 저장소가 당일 데이터를 매시간 오래된 것으로 보므로 매번 반복된다.
+# 그래서 종목 목록(fdr.StockListing('KRX'))에 이미 들어 있는 당일 시세로 이번 거래일 봉을 만들고,
+# 일봉 이력은 직전 거래일까지만 저장소에서 읽는다 (저장소에 빠진 구간이 있는 종목만 받는다).
+#  - 거래일(휴장일 반영)은 기준 종목 하나의 최근 일봉 날짜로 정한다 (요청 1회)
+#  - 장 마감 후 스캔은 스냅샷을 저장소에 확정 봉으로 기록해 다음 거래일에 다시 받지 않는다
+#    (앱의 예열 스레드도 장 마감 때 같은 기록을 남긴다)
+#  - 저장소가 비어 있는 첫 스캔만 종목 수 / 초당 요청 수 만큼 걸린다
+SCAN_LOOKBACK_DAYS = 2 * 365
+CALENDAR_CODE = '005930'  # 거래일 확인용 기준 종목 (삼성전자)
+SCAN_COLUMNS = ['Code', 'Name', 'Market', 'Date', 'Close', 'MA10', 'CMF',
+                'BuySignal', 'SellSignal', 'FearGreedScore']
+
+
+def scan_frame(code, df):
+    if df is None or df.empty:
+        return None
+    weekly = compute_weekly(df)
+    if weekly.empty:
+        return None
+    last = weekly.iloc[-1]
+    return {
+        'Code': code,
+        'Date': weekly.index[-1],
+        'Close': last['Close'],
+        'MA10': last['MA10'],
+        'CMF': last['CMF'],
+        'BuySignal': int(last['BuySignal']),
+        'SellSignal': int(last['SellSignal']),
+        'FearGreedScore': last['FearGreedScore'],
+    }
+
+
+# --------------------------------------------------------------------------
+# 🗓️ 당일 시세 스냅샷 (종목 목록의 Open/High/Low/Close/Volume)
+# --------------------------------------------------------------------------
+def snapshot_bars(listing):
+    # 종목코드 → 최근 거래일 OHLCV 한 줄 (종목 목록에 시세가 없으면 None, 예: LocalSource)
+    if not set(OHLCV_COLUMNS) <= set(listing.columns):
+        return None
+    return listing.set_index('Code')[OHLCV_COLUMNS].dropna()
+
+
+def market_sessions(loader=None, today=None):
+    # (스냅샷의 거래일, 직전 거래일): 기준 종목의 최근 일봉 날짜 (장중에는 당일 봉이 포함된다)
+    today = today or market_today()
+    df = (loader or default_source())(CALENDAR_CODE, start=today - timedelta(days=14), end=today)
+    days = sorted({ts.date() for ts in df.index})
+    return (days[-1], days[-2]) if len(days) >= 2 else None
+
+
+def session_closed(session, now=None):
+    return last_market_close(now).date() == session
+
+
+def _with_snapshot(items, bars, session):
+    # 직전 거래일까지의 이력 뒤에 스냅샷의 거래일 봉을 붙인다
+    out = []
+    for code, df in items:
+        if not isinstance(df, Exception) and code in bars.index:
+            bar = bars.loc[[code]].set_axis(pd.DatetimeIndex([pd.Timestamp(session)], name=df.index.name))
+            df = pd.concat([df.loc[df.index < pd.Timestamp(session), OHLCV_COLUMNS], bar]) if len(df) else bar
+        out.append((code, df))
+    return out
+
+
+def record_session(store, listing, sessions=None):
+    # 장 마감 후 스냅샷을 저장소에 그 거래일의 확정 봉으로 기록 (장중이거나 시세가 없으면 0)
+    bars = snapshot_bars(listing)
+    sessions = sessions or (market_sessions(store) if bars is not None else None)
+    if bars is None or sessions is None or not session_closed(sessions[0]):
+        return 0
+    return store.record_session(sessions[0], bars, since=sessions[1])
+
+
+# --------------------------------------------------------------------------
+# 🔀 다운로드 → 묶음 → 프로세스 풀 (scanner / batch 공용)
+# --------------------------------------------------------------------------
+def fetched_chunks(codes, start, end, loader=None, chunk_size=32, fetch_workers=FETCH_WORKERS):
+    # [(종목코드, 일봉 또는 예외), ...] 묶음을 내보내는 생성기 (다운로드 완료 순서)
+    with ConcurrentFetcher(loader, max_workers=fetch_workers) as fetcher:
+        chunk = []
+        for item in fetcher.fetch_many(codes, start, end):
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def map_chunks(func, chunks, workers=None):
+    # 프로세스 풀에서 func(묶음) 결과를 완료 순서대로 내보낸다. 동시에 제출하는 묶음을
+    # workers * 2 개로 제한해 (Executor.map 과 달리) 입력 생성기를 한꺼번에 소비하지 않는다
+    workers = workers or os.cpu_count()
+    if workers <= 1:
+        yield from map(func, chunks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(func, chunk))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+
+
+def _scan_chunk(items):
+    # 반환: (결과 행 목록, 실패한 종목코드 목록)
+    rows, failed = [], []
+    for code, df in items:
+        if isinstance(df, Exception):  # 다운로드 실패
+            failed.append(code)
+            continue
+        try:
+            row = scan_frame(code, df)
+        except Exception:
+            failed.append(code)
+            continue
+        if row is not None:
+            rows.append(row)
+    return rows, failed
+
+
+def scan_market(listing, end=None, lookback_days=SCAN_LOOKBACK_DAYS, workers=None, chunk_size=32,
+                loader=None, fetch_workers=FETCH_WORKERS):
+    # listing: 'Code'/'Name' 컬럼을 가진 종목 목록 (default_source().listing() 결과, 시세가 들어 있으면
+    #          당일 봉은 그 스냅샷으로 만든다 — 목록은 스캔 직전에 새로 받은 것이어야 한다)
+    # 반환: (종목별 마지막 주 지표 DataFrame, 불러오지 못한 종목코드 목록)
+    end = end or market_today()
+    start = end - timedelta(days=lookback_days)
+    bars = snapshot_bars(listing) if end >= market_today() else None
+    sessions = market_sessions(loader) if bars is not None else None
+    history_end = sessions[1] if sessions else end
+    chunks = fetched_chunks(listing['Code'].tolist(), start, history_end, loader, chunk_size, fetch_workers)
+    if sessions:
+        chunks = (_with_snapshot(chunk, bars, sessions[0]) for chunk in chunks)
+
+    rows, failed = [], []
+    for chunk_rows, chunk_failed in map_chunks(_scan_chunk, chunks, workers):
+        rows.extend(chunk_rows)
+        failed.extend(chunk_failed)
+    if sessions and hasattr(loader, 'record_session'):
+        record_session(loader, listing, sessions)
+
+    result = pd.DataFrame(rows, columns=[c for c in SCAN_COLUMNS if c not in ('Name', 'Market')])
+    names = listing.set_index('Code')
+    result.insert(1, 'Name', result['Code'].map(names['Name']))
+    result.insert(2, 'Market', result['Code'].map(names['Market']) if 'Market' in names else None)
+    return result.sort_values('FearGreedScore', ascending=False, ignore_index=True), failed
+
+
+def buy_signals_this_week(scan_df):
+    # 가장 최근 주에 매수 신호가 발생한 종목만 (거래정지로 지난 주에 멈춘 종목 제외)
+    if scan_df.empty:
+        return scan_df
+    latest = scan_df['Date'].max()
+    fired = scan_df[(scan_df['Date'] == latest) & (scan_df['BuySignal'] == 1)]
+    return fired.reset_index(drop=True)
@@ -0,0 +1,79 @@
+from bisect import bisect_left, bisect_right
+
+# --------------------------------------------------------------------------
+# 🔎 종목 검색 인덱스 (이름 / 초성 / 종목코드 접두어)
+# --------------------------------------------------------------------------
+# get_krx_list() 결과로 한 번만 만들어 두고 재실행·키 입력마다 재사용한다.
+#  - 이름 ↔ 코드: dict 로 O(1) 조회
+#  - 접두어 검색: 정렬된 키 배열에서 이진 탐색 (O(log n + 결과 수))
+POPULAR_STOCKS = ['삼성전자', 'SK하이닉스', 'LG에너지솔루션', '현대차', 'NAVER', '카카오', '삼성바이오로직스']
+
+CHOSUNG = ['ㄱ', 'ㄲ', 'ㄴ', 'ㄷ', 'ㄸ', 'ㄹ', 'ㅁ', 'ㅂ', 'ㅃ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅉ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+_CHOSUNG_SET = set(CHOSUNG)
+
+
+def to_chosung(text):
+    # '삼성전자' → 'ㅅㅅㅈㅈ' (한글 음절 외 문자는 소문자로 유지)
+    out = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        out.append(CHOSUNG[code // 588] if 0 <= code < 11172 else ch.lower())
+    return ''.join(out)
+
+
+class _PrefixIndex:
+    def __init__(self, pairs):
+        pairs = sorted(pairs)
+        self.keys = [k for k, _ in pairs]
+        self.values = [v for _, v in pairs]
+
+    def search(self, prefix, limit=None):
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_right(self.keys, prefix + '\uffff')
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return self.values[lo:hi]
+
+
+class TickerIndex:
+    def __init__(self, krx_list, popular=POPULAR_STOCKS):
+        names = krx_list['Name'].tolist()
+        codes = krx_list['Code'].tolist()
+        self.name_to_code = {}
+        for name, code in zip(names, codes):
+            self.name_to_code.setdefault(name, code)
+        self.code_to_name = {code: name for name, code in self.name_to_code.items()}
+
+        # 선택 목록: 인기 종목을 맨 앞에, 나머지는 가나다순
+        popular = [name for name in popular if name in self.name_to_code]
+        popular_set = set(popular)
+        self.options = popular + sorted(name for name in self.name_to_code if name not in popular_set)
+        self._rank = {name: i for i, name in enumerate(self.options)}
+
+        self._by_name = _PrefixIndex((name.lower(), name) for name in self.name_to_code)
+        self._by_chosung = _PrefixIndex((to_chosung(name), name) for name in self.name_to_code)
+        self._by_code = _PrefixIndex(self.code_to_name.items())
+
+    def code(self, name):
+        return self.name_to_code.get(name)
+
+    def name(self, code):
+        return self.code_to_name.get(code)
+
+    def search(self, query, limit=50):
+        # 숫자 → 종목코드, 초성만 → 초성, 그 외 → 이름 접두어 검색
+        query = query.strip()
+        if not query:
+            return self.options[:limit]
+        if query.isdigit():
+            matches = self._by_code.search(query, limit)
+        elif all(ch in _CHOSUNG_SET for ch in query):
+            matches = self._by_chosung.search(query)
+        else:
+            # 입력 중인 '삼성ㅈ' 처럼 끝에 초성이 붙은 경우: 앞부분은 이름, 뒷부분은 초성으로 비교
+            head = query.rstrip(''.join(CHOSUNG))
+            tail = query[len(head):]
+            matches = self._by_name.search(head.lower())
+            if tail:
+                matches = [name for name in matches if to_chosung(name)[len(head):len(query)] == tail]
+        return sorted(set(matches), key=self._rank.__getitem__)[:limit]
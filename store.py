@@ -0,0 +1,261 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, time as clock, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+import telemetry
+from datasource import default_source
+
+# --------------------------------------------------------------------------
+# 💾 로컬 일봉 저장소 (종목별 memory-mapped 바이너리 + 증분 동기화)
+# --------------------------------------------------------------------------
+# 종목마다 고정 길이 레코드(날짜 + OHLCV)를 날짜순으로 이어 붙인 <code>.bin 파일과
+# 동기화 범위를 기록한 <code>.json 파일을 둔다.
+#  - 동기화: 마지막 저장일부터 요청 종료일까지만 다시 받아 꼬리 부분만 덮어쓴다
+#    (저장된 시작일보다 앞쪽이 필요하면 빠진 앞부분만 받아 기존 기록 앞에 붙인다)
+#  - 조회: np.memmap 위에서 날짜를 이진 탐색해 필요한 구간만 읽는다
+#  - 장 마감 후에는 전 종목 시세 스냅샷 한 번으로 그날 봉을 기록할 수 있다 (record_session)
+#  - reader 에는 fdr.DataReader 와 같은 시그니처의 아무 함수나 넣을 수 있어
+#    로컬 파일 기반 데이터로도 오프라인에서 동작한다 (기본값: datasource.default_source())
+STORE_DIR = os.environ.get('OHLCV_STORE_DIR', '.ohlcv_store')
+REFRESH_SECONDS = 60 * 60  # 당일 데이터 재동기화 주기 (장중 가격 갱신용)
+KST = ZoneInfo('Asia/Seoul')
+MARKET_OPEN = clock(9, 0)
+MARKET_CLOSE = clock(15, 40)  # 장 마감(15:30) 후 여유를 두고 이후 데이터는 확정으로 본다
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+RECORD_DTYPE = np.dtype([
+    ('Date', '<i8'), ('Open', '<f8'), ('High', '<f8'), ('Low', '<f8'), ('Close', '<f8'), ('Volume', '<i8')
+])
+
+
+def _to_records(df):
+    df = df[PRICE_COLUMNS + ['Volume']].dropna()
+    records = np.empty(len(df), dtype=RECORD_DTYPE)
+    records['Date'] = df.index.values.astype('datetime64[ns]').view('i8')
+    for col in PRICE_COLUMNS:
+        records[col] = df[col].to_numpy(dtype='f8')
+    records['Volume'] = df['Volume'].to_numpy(dtype='i8')
+    return records
+
+
+def _to_frame(records):
+    index = pd.DatetimeIndex(records['Date'].astype('datetime64[ns]'), name='Date')
+    return pd.DataFrame({col: records[col] for col in PRICE_COLUMNS + ['Volume']}, index=index)
+
+
+def _to_ns(day):
+    return pd.Timestamp(day).value
+
+
+# --------------------------------------------------------------------------
+# 🕒 장 운영 시간 (당일 데이터 갱신 단위)
+# --------------------------------------------------------------------------
+def market_today(now=None):
+    # 캐시 키·동기화 범위에 쓰는 '오늘': 서버 시간대와 무관하게 한국 시간 기준이고, 자정이 아니라
+    # 평일 개장 시각에 넘어간다 (장 시작 전 새벽과 주말은 직전 거래일 = 그 사이 새 시세가 없다)
+    now = now or datetime.now(KST)
+    day = now.date() if now.time() >= MARKET_OPEN else now.date() - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def is_market_open(now=None):
+    now = now or datetime.now(KST)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def last_market_close(now=None):
+    # now 이전의 가장 최근 장 마감 시각 (주말 건너뛰기)
+    now = now or datetime.now(KST)
+    close = datetime.combine(now.date(), MARKET_CLOSE, tzinfo=KST)
+    if now < close:
+        close -= timedelta(days=1)
+    while close.weekday() >= 5:
+        close -= timedelta(days=1)
+    return close
+
+
+def refresh_token(now=None):
+    # 당일 데이터의 버전: 장중에는 REFRESH_SECONDS 마다 바뀌고, 장 마감 후에는 다음 개장까지 고정
+    now = now or datetime.now(KST)
+    if is_market_open(now):
+        return int(now.timestamp() // REFRESH_SECONDS)
+    return last_market_close(now).isoformat()
+
+
+class OHLCVStore:
+    def __init__(self, root=STORE_DIR, reader=None, refresh_seconds=REFRESH_SECONDS):
+        self.root = root
+        self.reader = reader or default_source()
+        self.refresh_seconds = refresh_seconds
+        self._init_locks()
+        os.makedirs(root, exist_ok=True)
+
+    # 종목별 Lock: 서로 다른 종목은 여러 스레드에서 동시에 동기화할 수 있다
+    def _init_locks(self):
+        self._locks_guard = threading.Lock()
+        self._locks = defaultdict(threading.Lock)
+
+    def _lock(self, code):
+        with self._locks_guard:
+            return self._locks[code]
+
+    # 프로세스 풀로 넘길 수 있도록 Lock 은 피클링에서 제외
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_locks_guard'], state['_locks']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_locks()
+
+    def _data_path(self, code):
+        return os.path.join(self.root, f'{code}.bin')
+
+    def _meta_path(self, code):
+        return os.path.join(self.root, f'{code}.json')
+
+    def _read_meta(self, code):
+        try:
+            with open(self._meta_path(code)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, code, meta):
+        tmp = self._meta_path(code) + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path(code))
+
+    def _records(self, code):
+        path = self._data_path(code)
+        if not os.path.exists(path) or os.path.getsize(path) < RECORD_DTYPE.itemsize:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.memmap(path, dtype=RECORD_DTYPE, mode='r')
+
+    def _fetch(self, code, start, end):
+        with telemetry.span('source.daily'):
+            df = self.reader(code, start=start, end=end)
+        if df is None or df.empty:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return _to_records(df)
+
+    # ----------------------------------------------------------------------
+    # 동기화
+    # ----------------------------------------------------------------------
+    def sync(self, code, start, end=None):
+        start = pd.Timestamp(start).date()
+        today = market_today()
+        end = min(pd.Timestamp(end or today).date(), today)
+        with self._lock(code):
+            meta = self._read_meta(code)
+            records = self._records(code)
+
+            # 저장된 기록이 없으면 전체를 받는다
+            if meta is None or not len(records):
+                telemetry.count('store.sync', False)
+                fetched = self._fetch(code, start, end)
+                tmp = self._data_path(code) + '.tmp'
+                fetched.tofile(tmp)
+                os.replace(tmp, self._data_path(code))
+                self._write_meta(code, {'start': start.isoformat(), 'synced_until': end.isoformat(),
+                                        'synced_at': time.time()})
+                return len(fetched)
+
+            # 저장된 시작일보다 앞쪽이 필요하면 빠진 앞부분만 받아 붙인다 (뒤쪽 기록은 그대로 유지)
+            stored_start = date.fromisoformat(meta['start'])
+            n_head = 0
+            if start < stored_start:
+                head = self._fetch(code, start, stored_start - timedelta(days=1))
+                head = head[head['Date'] < records['Date'][0]]
+                n_head = len(head)
+                combined = np.concatenate([head, records])
+                del records
+                tmp = self._data_path(code) + '.tmp'
+                combined.tofile(tmp)
+                os.replace(tmp, self._data_path(code))
+                meta['start'] = start.isoformat()
+                self._write_meta(code, meta)
+                records = self._records(code)
+
+            synced_until = date.fromisoformat(meta['synced_until'])
+            # 장중 refresh_seconds 가 지났거나, 마지막 동기화가 직전 장 마감 전(장중 미완성 봉)이면 다시 받는다
+            stale_today = end >= today and (time.time() - meta['synced_at'] > self.refresh_seconds
+                                                   or meta['synced_at'] < last_market_close().timestamp())
+            telemetry.count('store.sync', end <= synced_until and not stale_today and start >= stored_start)
+            if end <= synced_until and not stale_today:
+                return n_head
+
+            # 마지막 저장일(장중에 받은 미완성 봉일 수 있음)부터 다시 받아 꼬리만 교체
+            last_day = pd.Timestamp(int(records['Date'][-1])).date()
+            tail = self._fetch(code, last_day, end)
+            if not len(tail):
+                return n_head
+            keep = int(np.searchsorted(records['Date'], _to_ns(last_day), side='left'))
+            del records
+            self._replace_tail(code, keep, tail)
+            meta.update({'synced_until': max(end, synced_until).isoformat(), 'synced_at': time.time()})
+            self._write_meta(code, meta)
+            return n_head + len(tail)
+
+    def _replace_tail(self, code, keep, tail):
+        # 앞쪽 keep 개 기록 뒤를 tail 로 바꾼다 (호출자가 종목 Lock 을 잡고 memmap 을 닫은 상태)
+        with open(self._data_path(code), 'r+b') as f:
+            f.seek(keep * RECORD_DTYPE.itemsize)
+            tail.tofile(f)
+            f.truncate()
+
+    def record_session(self, day, bars, since):
+        # 장 마감 후 시세 스냅샷(종목코드 → OHLCV 한 줄, fdr.StockListing('KRX'))을 day 의 확정 봉으로
+        # 기록한다. since(직전 거래일)까지 동기화된 종목만 — 사이가 빈 종목은 다음 sync 가 받아 채우고,
+        # 이미 장 마감 후에 동기화한 종목은 그대로 둔다. 반환: 기록한 종목 수
+        closed_at = last_market_close().timestamp()
+        n = 0
+        for code, bar in bars.iterrows():
+            with self._lock(code):
+                meta = self._read_meta(code)
+                records = self._records(code)
+                if meta is None or not len(records) or date.fromisoformat(meta['synced_until']) < since:
+                    continue
+                synced_until = date.fromisoformat(meta['synced_until'])
+                if synced_until >= day and meta['synced_at'] >= closed_at:
+                    continue
+                new = _to_records(pd.DataFrame([bar], index=pd.DatetimeIndex([pd.Timestamp(day)])))
+                if not len(new) or records['Date'][-1] > new['Date'][0]:
+                    continue
+                keep = int(np.searchsorted(records['Date'], _to_ns(day), side='left'))
+                del records
+                self._replace_tail(code, keep, new)
+                meta.update({'synced_until': max(day, synced_until).isoformat(), 'synced_at': time.time()})
+                self._write_meta(code, meta)
+                n += 1
+        return n
+
+    # ----------------------------------------------------------------------
+    # 조회
+    # ----------------------------------------------------------------------
+    def read(self, code, start=None, end=None):
+        records = self._records(code)
+        dates = records['Date']
+        lo = 0 if start is None else int(np.searchsorted(dates, _to_ns(start), side='left'))
+        hi = len(dates) if end is None else int(
+            np.searchsorted(dates, _to_ns(pd.Timestamp(end) + timedelta(days=1)), side='left'))
+        return _to_frame(np.array(records[lo:hi]))
+
+    def load(self, code, start, end=None, offline=False):
+        # fdr.DataReader(code, start=..., end=...) 대체용
+        if not offline:
+            self.sync(code, start, end)
+        return self.read(code, start, end)
+
+    def __call__(self, code, start, end=None):
+        return self.load(code, start, end)
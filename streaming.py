@@ -0,0 +1,249 @@
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from indicators import clean_daily
+
+# --------------------------------------------------------------------------
+# 🔄 증분(스트리밍) 지표 계산
+# --------------------------------------------------------------------------
+# indicators.compute_weekly 와 같은 값을 주봉 하나씩 O(1) 로 갱신한다.
+# 종목마다 창 크기만큼의 상태(deque, 누적합, Welford 분산)만 유지하며,
+#  - update_weekly(): 완성된 주봉을 반영(커밋)
+#  - update_daily() : 일봉을 진행 중인 주봉에 합친 뒤, 커밋하지 않은 채 잠정 지표를 계산
+#                     (다음 주 일봉이 들어오면 그때 진행 중이던 주봉을 커밋)
+# 결과는 pandas 일괄 계산과 부동소수점 오차 범위 안에서 일치한다.
+NAN = float('nan')
+
+
+def _div(a, b):
+    # pandas 와 같은 0 나눗셈 의미 (0/0 → NaN, x/0 → ±inf)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float(np.float64(a) / np.float64(b))
+
+
+def _clip(x, lower, upper):
+    return x if math.isnan(x) else min(max(x, lower), upper)
+
+
+def _week_label(day):
+    # resample('W-FRI') 의 라벨 (해당 주 금요일)
+    day = pd.Timestamp(day).normalize()
+    return day + pd.Timedelta(days=(4 - day.weekday()) % 7)
+
+
+class _RollingSum:
+    # rolling(window, min_periods).sum()/mean() — NaN 은 관측치에서 제외, Kahan 보정 누적합
+    def __init__(self, window, min_periods):
+        self.window = window
+        self.min_periods = min_periods
+        self.values = deque()
+        self.state = (0, 0.0, 0.0)  # (nobs, sum, compensation)
+
+    def _next_state(self, x):
+        nobs, total, comp = self.state
+        updates = [(x, 1)] if not math.isnan(x) else []
+        if len(self.values) == self.window and not math.isnan(self.values[0]):
+            updates.append((-self.values[0], -1))
+        for val, step in updates:
+            nobs += step
+            y = val - comp
+            t = total + y
+            comp = t - total - y
+            total = t
+        if nobs == 0:
+            total, comp = 0.0, 0.0
+        return nobs, total, comp
+
+    def update(self, x, commit=True):
+        state = self._next_state(x)
+        if commit:
+            self.state = state
+            self.values.append(x)
+            if len(self.values) > self.window:
+                self.values.popleft()
+        return state
+
+    def sum(self, x, commit=True):
+        nobs, total, _ = self.update(x, commit)
+        return total if nobs >= self.min_periods else NAN
+
+    def mean(self, x, commit=True):
+        nobs, total, _ = self.update(x, commit)
+        return total / nobs if nobs >= self.min_periods and nobs > 0 else NAN
+
+
+class _RollingStd:
+    # rolling(window, min_periods).std() (ddof=1), Welford 추가/제거
+    def __init__(self, window, min_periods):
+        self.window = window
+        self.min_periods = min_periods
+        self.values = deque()
+        self.state = (0, 0.0, 0.0)  # (nobs, mean, ssqdm)
+
+    def _next_state(self, x):
+        nobs, mean, ssqdm = self.state
+        if len(self.values) == self.window and not math.isnan(self.values[0]):
+            old = self.values[0]
+            nobs -= 1
+            if nobs:
+                delta = old - mean
+                mean -= delta / nobs
+                ssqdm -= delta * (old - mean)
+            else:
+                mean, ssqdm = 0.0, 0.0
+        if not math.isnan(x):
+            nobs += 1
+            delta = x - mean
+            mean += delta / nobs
+            ssqdm += delta * (x - mean)
+        return nobs, mean, ssqdm
+
+    def std(self, x, commit=True):
+        state = self._next_state(x)
+        if commit:
+            self.state = state
+            self.values.append(x)
+            if len(self.values) > self.window:
+                self.values.popleft()
+        nobs, _, ssqdm = state
+        if nobs < self.min_periods or nobs <= 1:
+            return NAN
+        return math.sqrt(max(ssqdm, 0.0) / (nobs - 1))
+
+
+class _RollingExtreme:
+    # rolling(window, min_periods=1).min()/max() — 단조 deque (입력에 NaN 없음)
+    def __init__(self, window, is_max):
+        self.window = window
+        self.better = (lambda a, b: a >= b) if is_max else (lambda a, b: a <= b)
+        self.candidates = deque()  # (순번, 값)
+        self.count = 0
+
+    def update(self, x, commit=True):
+        drop_before = self.count - self.window + 1
+        best = x
+        for pos, value in self.candidates:
+            if pos >= drop_before:
+                best = value if self.better(value, x) else x
+                break
+        if commit:
+            while self.candidates and self.better(x, self.candidates[-1][1]):
+                self.candidates.pop()
+            self.candidates.append((self.count, x))
+            if self.candidates[0][0] < drop_before:
+                self.candidates.popleft()
+            self.count += 1
+        return best
+
+
+class IncrementalIndicators:
+    def __init__(self):
+        self.ma10 = _RollingSum(10, 10)
+        self.mf_volume = _RollingSum(4, 4)
+        self.volume4 = _RollingSum(4, 4)
+        self.low52 = _RollingExtreme(52, is_max=False)
+        self.high52 = _RollingExtreme(52, is_max=True)
+        self.volume5 = _RollingSum(5, 1)
+        self.volume20 = _RollingSum(20, 1)
+        self.return_std5 = _RollingStd(5, 1)
+        self.return_std20 = _RollingStd(20, 1)
+        self.momentum7 = _RollingSum(7, 1)
+        self.position7 = _RollingSum(7, 1)
+        self.surge10 = _RollingSum(10, 1)
+        self.spike10 = _RollingSum(10, 1)
+        self.closes = deque(maxlen=5)
+        self.prev_bar = None
+        self.pending = None  # 일봉으로 채워지고 있는 주봉
+        self.last = None
+
+    # ----------------------------------------------------------------------
+    # 주봉 하나 반영
+    # ----------------------------------------------------------------------
+    def _step(self, bar, commit):
+        o, h, l, c, v = bar['Open'], bar['High'], bar['Low'], bar['Close'], float(bar['Volume'])
+        prev_high = self.prev_bar['High'] if self.prev_bar else NAN
+        prev_low = self.prev_bar['Low'] if self.prev_bar else NAN
+
+        ma10 = self.ma10.mean(c, commit)
+        mf_multiplier = _div((c - l) - (h - c), h - l)
+        cmf = _div(self.mf_volume.sum(mf_multiplier * v, commit), self.volume4.sum(v, commit))
+        buy = int(h > prev_high and c > ma10 and cmf > 0)
+        sell = int(l < prev_low and c < ma10 and cmf < 0)
+
+        momentum = (math.log(c) - math.log(self.closes[0])) * 100 if len(self.closes) == 5 else NAN
+        low52, high52 = self.low52.update(c, commit), self.high52.update(c, commit)
+        position = _clip(_div(c - low52, high52 - low52), 0, 1)
+        surge = _clip(_div(self.volume5.mean(v, commit), self.volume20.mean(v, commit)), 0, 3)
+        weekly_return = c / self.closes[-1] - 1 if self.closes else NAN
+        spike = _clip(_div(self.return_std5.std(weekly_return, commit),
+                           self.return_std20.std(weekly_return, commit)), 0, 3)
+
+        momentum_score = _clip(self.momentum7.mean(momentum, commit) / 10, -1, 1.5)
+        position_score = _clip(2 * self.position7.mean(position, commit) - 1, -1, 1.5)
+        volume_score = _clip(self.surge10.mean(surge, commit) - 1, -0.5, 1.2)
+        volatility_score = -_clip(self.spike10.mean(spike, commit) - 1, -0.5, 1.2)
+        fear_greed = 0.45 * momentum_score + 0.45 * position_score + 0.05 * volume_score + 0.05 * volatility_score
+
+        if commit:
+            self.closes.append(c)
+            self.prev_bar = bar
+        return {
+            **bar, 'Prev_High': prev_high, 'Prev_Low': prev_low, 'MA10': ma10, 'CMF': cmf,
+            'BuySignal': buy, 'SellSignal': sell, 'Momentum5': momentum, 'Position52W': position,
+            'VolumeSurge': surge, 'VolatilitySpike': spike, 'FearGreedScore': fear_greed,
+        }
+
+    def _commit_pending(self):
+        if self.pending is not None:
+            self.last = self._step(self.pending, commit=True)
+            self.pending = None
+
+    def update_weekly(self, day, o, h, l, c, v):
+        # 완성된 주봉 반영 (진행 중이던 일봉 주봉이 있으면 먼저 커밋)
+        label = _week_label(day)
+        if self.pending is not None and self.pending['Date'] != label:
+            self._commit_pending()
+        self.pending = None
+        self.last = self._step({'Date': label, 'Open': o, 'High': h, 'Low': l, 'Close': c, 'Volume': v},
+                               commit=True)
+        return self.last
+
+    def update_daily(self, day, o, h, l, c, v):
+        # 일봉 반영 → 진행 중인 주봉의 잠정 지표 (clean_daily 기준에 걸리는 봉은 무시)
+        if any(math.isnan(x) for x in (o, h, l, c, v)) or 0 in (o, h, l, c):
+            return self.current()
+        label = _week_label(day)
+        if self.pending is not None and self.pending['Date'] != label:
+            self._commit_pending()
+        if self.pending is None:
+            self.pending = {'Date': label, 'Open': o, 'High': h, 'Low': l, 'Close': c, 'Volume': v}
+        else:
+            self.pending.update({'High': max(self.pending['High'], h), 'Low': min(self.pending['Low'], l),
+                                 'Close': c, 'Volume': self.pending['Volume'] + v})
+        return self.current()
+
+    def current(self):
+        # 마지막 주의 지표 (진행 중인 주봉이 있으면 잠정값)
+        if self.pending is not None:
+            return self._step(self.pending, commit=False)
+        return self.last
+
+    # ----------------------------------------------------------------------
+    # 과거 데이터로 상태 초기화
+    # ----------------------------------------------------------------------
+    @classmethod
+    def from_weekly(cls, weekly):
+        state = cls()
+        for day, o, h, l, c, v in weekly[['Open', 'High', 'Low', 'Close', 'Volume']].itertuples():
+            state.update_weekly(day, o, h, l, c, v)
+        return state
+
+    @classmethod
+    def from_daily(cls, df):
+        state = cls()
+        for day, o, h, l, c, v in clean_daily(df).itertuples():
+            state.update_daily(day, o, h, l, c, v)
+        return state
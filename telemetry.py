@@ -0,0 +1,231 @@
+import contextvars
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+# --------------------------------------------------------------------------
+# ⏱️ 단계별 시간 / 캐시 적중 / 메모리 계측
+# --------------------------------------------------------------------------
+# 분석 한 번(run)마다 단계별 span 시간, 캐시 적중/미스 횟수, 최대 메모리를 모아
+# 앱 디버그 패널에 보여 주고, 로그 경로가 지정되어 있으면 JSON lines 로 한 줄씩 남긴다.
+#  - span / count 는 현재 실행 중인 run 이 없으면 아무 일도 하지 않는다
+#    (백그라운드 예열 스레드, 프로세스 풀 작업자 등)
+#  - 현재 run 은 contextvar 로 찾으므로 Streamlit 세션(스레드)마다 분리된다
+#  - 메모리는 trace_memory=True 인 run 만 잰다: 파이썬 객체 단위 최대 할당량(peak_mem_kb, tracemalloc)과
+#    실행 중 최대 RSS(peak_rss_kb, Linux 에서 시작 시 /proc/self/clear_refs 로 VmHWM 을 현재 값으로
+#    되돌리고 끝날 때 읽는다). 둘 다 프로세스 전역이라 되돌리는 순간 다른 세션의 최대치도 지워지므로
+#    평소 run 은 건드리지 않는다 (프로세스 전체 최대치 max_rss_mb 는 항상 기록)
+# 로그는 기본으로 남기지 않는다. TELEMETRY_LOG 환경 변수에 경로를 주면 켜지고,
+# 파일이 TELEMETRY_LOG_MAX_BYTES 를 넘으면 <경로>.1 로 옮기고 새로 쓴다 (이전 .1 은 지워진다).
+# 여러 로그를 모아 단계별 지연 시간 백분위를 보려면:
+#   TELEMETRY_LOG=telemetry.jsonl streamlit run app.py
+#   python telemetry.py telemetry.jsonl [telemetry.jsonl.1 ...]
+TELEMETRY_LOG = os.environ.get('TELEMETRY_LOG', '')
+TELEMETRY_LOG_MAX_BYTES = int(os.environ.get('TELEMETRY_LOG_MAX_BYTES', 10 * 1024 * 1024))
+PERCENTILES = [0.5, 0.9, 0.99]
+
+_current = contextvars.ContextVar('telemetry_run', default=None)
+_log_lock = threading.Lock()
+
+
+class RunRecord:
+    def __init__(self, name, tags):
+        self.name = name
+        self.tags = tags
+        self.spans = {}     # 이름 → [누적 초, 호출 수]
+        self.counters = {}  # 이름 → {'hit': n, 'miss': n}
+        self.started_at = datetime.now(timezone.utc)
+        self.total_seconds = None
+        self.peak_mem_kb = None
+        self.peak_rss_kb = None
+        self.error = None
+
+    def add_span(self, name, seconds):
+        entry = self.spans.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def add_count(self, name, hit):
+        entry = self.counters.setdefault(name, {'hit': 0, 'miss': 0})
+        entry['hit' if hit else 'miss'] += 1
+
+    def to_dict(self):
+        return {
+            'ts': self.started_at.isoformat(timespec='milliseconds'),
+            'run': self.name,
+            'tags': self.tags,
+            'total_ms': round(self.total_seconds * 1000, 3) if self.total_seconds is not None else None,
+            'spans': {name: {'ms': round(sec * 1000, 3), 'count': n} for name, (sec, n) in self.spans.items()},
+            'counters': self.counters,
+            'peak_mem_kb': self.peak_mem_kb,
+            'peak_rss_kb': self.peak_rss_kb,
+            'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            'error': self.error,
+        }
+
+
+def current():
+    return _current.get()
+
+
+def _reset_peak_rss():
+    # Linux 전용: VmHWM(최대 RSS)을 현재 RSS 로 되돌린다 (다른 OS / 권한 없음이면 False)
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_kb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+@contextmanager
+def _timed(record, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record.add_span(name, time.perf_counter() - start)
+
+
+def span(name):
+    # with telemetry.span('resample'): ...
+    record = _current.get()
+    return _timed(record, name) if record is not None else nullcontext()
+
+
+def count(name, hit):
+    record = _current.get()
+    if record is not None:
+        record.add_count(name, hit)
+
+
+def miss(name):
+    count(name, False)
+
+
+def cached(name, func, *args, **kwargs):
+    # st.cache_* 로 감싼 함수 호출의 적중 여부 기록: 함수 본문에서 miss(name) 을 부르면
+    # 미스, 본문이 실행되지 않았으면(캐시 반환) 적중으로 센다
+    record = _current.get()
+    if record is None:
+        return func(*args, **kwargs)
+    before = record.counters.get(name, {}).get('miss', 0)
+    value = func(*args, **kwargs)
+    if record.counters.get(name, {}).get('miss', 0) == before:
+        record.add_count(name, True)
+    return value
+
+
+def write_record(record, path=None):
+    path = TELEMETRY_LOG if path is None else path
+    if not path:
+        return
+    line = json.dumps(record.to_dict(), ensure_ascii=False, default=str)
+    with _log_lock:
+        try:
+            if os.path.getsize(path) >= TELEMETRY_LOG_MAX_BYTES:
+                os.replace(path, path + '.1')
+        except OSError:
+            pass
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+
+@contextmanager
+def run(name, trace_memory=False, log_path=None, **tags):
+    # 분석 한 번을 감싸는 컨텍스트. 끝나면 (로그 경로가 있으면) JSON lines 로그에 기록한다.
+    record = RunRecord(name, tags)
+    token = _current.set(record)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    elif trace_memory:
+        tracemalloc.reset_peak()
+    track_rss = trace_memory and _reset_peak_rss()
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as exc:
+        record.error = repr(exc)
+        raise
+    finally:
+        record.total_seconds = time.perf_counter() - start
+        if track_rss:
+            record.peak_rss_kb = _peak_rss_kb()
+        if trace_memory:
+            record.peak_mem_kb = tracemalloc.get_traced_memory()[1] // 1024
+            if started_tracing:
+                tracemalloc.stop()
+        _current.reset(token)
+        write_record(record, log_path)
+
+
+# --------------------------------------------------------------------------
+# 📈 로그 집계 (단계별 지연 시간 백분위)
+# --------------------------------------------------------------------------
+def read_log(paths):
+    records = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    return records
+
+
+def latency_percentiles(records):
+    import pandas as pd
+
+    rows = []
+    for rec in records:
+        rows.append({'run': rec['run'], 'stage': 'total', 'ms': rec['total_ms']})
+        rows.extend({'run': rec['run'], 'stage': stage, 'ms': s['ms']} for stage, s in rec['spans'].items())
+    if not rows:
+        return pd.DataFrame()
+    frame = pd.DataFrame(rows)
+    table = frame.groupby(['run', 'stage'])['ms'].quantile(PERCENTILES).unstack()
+    table.columns = [f'p{int(q * 100)}' for q in PERCENTILES]
+    table.insert(0, 'n', frame.groupby(['run', 'stage']).size())
+    return table
+
+
+def cache_hit_rates(records):
+    totals = {}
+    for rec in records:
+        for name, c in rec['counters'].items():
+            entry = totals.setdefault(name, {'hit': 0, 'miss': 0})
+            entry['hit'] += c['hit']
+            entry['miss'] += c['miss']
+    return {name: c['hit'] / (c['hit'] + c['miss']) for name, c in totals.items() if c['hit'] + c['miss']}
+
+
+def main(argv=None):
+    paths = (argv if argv is not None else sys.argv[1:]) or [TELEMETRY_LOG]
+    if not all(paths):
+        print('usage: python telemetry.py <log.jsonl> [...] (또는 TELEMETRY_LOG 지정)', file=sys.stderr)
+        return 2
+    records = read_log(paths)
+    print(f'{len(records)} runs')
+    print(latency_percentiles(records).round(1).to_string())
+    for name, rate in sorted(cache_hit_rates(records).items()):
+        print(f'cache {name:<20} hit rate {rate:.1%}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
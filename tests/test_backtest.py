@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import batch_summary, batch_trade_returns, resolve_positions, run_backtest, signal_triggers
+
+# --------------------------------------------------------------------------
+# 기존 app.py / app2.py 의 행 단위(iloc) 루프 구현 (벡터화 엔진의 기준)
+# --------------------------------------------------------------------------
+def _trades(entries, exits):
+    bt_df = pd.DataFrame()
+    summary = {'total_trades': 0, 'avg_return': 0, 'cum_return': 0, 'win_rate': 0}
+    if entries:
+        bt_df = pd.DataFrame(entries, columns=['EntryDate', 'EntryPrice'])
+        bt_df['ExitDate'], bt_df['ExitPrice'] = zip(*exits)
+        bt_df['Return'] = (bt_df['ExitPrice'] - bt_df['EntryPrice']) / bt_df['EntryPrice']
+        bt_df['CumulativeReturn'] = (1 + bt_df['Return']).cumprod()
+        summary = {
+            'total_trades': len(bt_df),
+            'avg_return': bt_df['Return'].mean(),
+            'cum_return': bt_df['CumulativeReturn'].iloc[-1] - 1,
+            'win_rate': (bt_df['Return'] > 0).mean()
+        }
+    return bt_df, summary
+
+
+def loop_backtest_original(weekly_df):
+    df = weekly_df.copy()
+    position = False
+    entries, exits = [], []
+    entry_date_temp = None
+
+    for i in range(1, len(df)):
+        row = df.iloc[i]
+        if not position and row['BuySignal'] == 1:
+            entry_date_temp = row.name
+            entry_price = row['Open']
+            position = True
+        elif position and row['SellSignal'] == 1:
+            entries.append((entry_date_temp, entry_price))
+            exits.append((row.name, row['Close']))
+            position = False
+
+    if position and entry_date_temp:
+        last_row = df.iloc[-1]
+        entries.append((entry_date_temp, entry_price))
+        exits.append((last_row.name, last_row['Close']))
+
+    # app.py 의 차트용 '실제 매도' 표시 루프 (마지막 봉 강제 청산은 표시하지 않음)
+    df['ActualSellSignal'] = 0
+    position = False
+    for i in range(1, len(df)):
+        if not position and df.iloc[i]['BuySignal'] == 1:
+            position = True
+        elif position and df.iloc[i]['SellSignal'] == 1:
+            df.loc[df.index[i], 'ActualSellSignal'] = 1
+            position = False
+    return (*_trades(entries, exits), df['ActualSellSignal'])
+
+
+def loop_backtest_revised(weekly_df):
+    df = weekly_df.copy()
+    df['BuyTrigger'] = df['BuySignal'].shift(1)
+    df['SellTrigger'] = df['SellSignal'].shift(1)
+    df['ActualSellSignal'] = 0
+
+    position = False
+    entries, exits = [], []
+    entry_date_temp = None
+
+    for i in range(1, len(df)):
+        row = df.iloc[i]
+        if not position and row['BuyTrigger'] == 1:
+            entry_date_temp = row.name
+            entry_price = row['Open']
+            position = True
+        elif position and row['SellTrigger'] == 1:
+            entries.append((entry_date_temp, entry_price))
+            exits.append((row.name, row['Open']))
+            position = False
+            df.loc[df.index[i], 'ActualSellSignal'] = 1
+
+    if position and entry_date_temp:
+        last_row = df.iloc[-1]
+        entries.append((entry_date_temp, entry_price))
+        exits.append((last_row.name, last_row['Open']))
+        df.loc[df.index[-1], 'ActualSellSignal'] = 1
+    return (*_trades(entries, exits), df['ActualSellSignal'])
+
+
+LOOPS = {False: loop_backtest_original, True: loop_backtest_revised}
+
+
+def random_weekly(seed, n_weeks=None, density=0.3):
+    rng = np.random.default_rng(seed)
+    n = n_weeks if n_weeks is not None else int(rng.integers(1, 80))
+    close = 10_000 * np.exp(np.cumsum(rng.normal(0, 0.05, n)))
+    open_ = close * np.exp(rng.normal(0, 0.02, n))
+    return pd.DataFrame({
+        'Open': open_.round(),
+        'Close': close.round(),
+        # 같은 봉에 매수/매도가 겹치는 경우도 섞이도록 독립적으로 뽑는다
+        'BuySignal': (rng.random(n) < density).astype('int64'),
+        'SellSignal': (rng.random(n) < density).astype('int64'),
+    }, index=pd.date_range('2015-01-02', periods=n, freq='W-FRI', name='Date'))
+
+
+def assert_same(result, expected):
+    bt_df, summary, actual_sell = result
+    exp_df, exp_summary, exp_sell = expected
+    if exp_df.empty:
+        assert bt_df.empty
+    else:
+        pd.testing.assert_frame_equal(bt_df, exp_df, check_dtype=False)
+    assert summary.keys() == exp_summary.keys()
+    for key, value in exp_summary.items():
+        assert summary[key] == pytest.approx(value, rel=1e-12, abs=0)
+    np.testing.assert_array_equal(actual_sell.to_numpy(), exp_sell.to_numpy())
+    assert actual_sell.index.equals(exp_sell.index)
+
+
+@pytest.mark.parametrize('revised', [False, True])
+@pytest.mark.parametrize('seed', range(150))
+def test_run_backtest_matches_loops(seed, revised):
+    weekly = random_weekly(seed, density=[0.05, 0.3, 0.7][seed % 3])
+    assert_same(run_backtest(weekly, revised), LOOPS[revised](weekly))
+
+
+@pytest.mark.parametrize('revised', [False, True])
+@pytest.mark.parametrize('n_weeks', [0, 1, 2])
+def test_run_backtest_short_history(n_weeks, revised):
+    weekly = random_weekly(n_weeks, n_weeks=n_weeks, density=1.0)
+    bt_df, summary, actual_sell = run_backtest(weekly, revised)
+    if n_weeks:
+        assert_same((bt_df, summary, actual_sell), LOOPS[revised](weekly))
+    else:
+        assert bt_df.empty and summary['total_trades'] == 0 and actual_sell.empty
+
+
+@pytest.mark.parametrize('revised', [False, True])
+def test_batch_engine_matches_single_ticker(revised):
+    # (시나리오 × 주) 2차원 엔진의 행별 결과 == 종목별 run_backtest
+    weeklies = [random_weekly(1000 + i, n_weeks=60) for i in range(30)]
+    buy, sell = signal_triggers(np.stack([w['BuySignal'] for w in weeklies]),
+                                np.stack([w['SellSignal'] for w in weeklies]), revised)
+    opens = np.stack([w['Open'] for w in weeklies])
+    exit_px = opens if revised else np.stack([w['Close'] for w in weeklies])
+    rows, returns = batch_trade_returns(resolve_positions(buy, sell), opens, exit_px)
+    batch = batch_summary(rows, returns, len(weeklies))
+
+    for i, weekly in enumerate(weeklies):
+        expected = LOOPS[revised](weekly)[1]
+        for key, value in expected.items():
+            assert batch[key][i] == pytest.approx(value, rel=1e-12, abs=0)
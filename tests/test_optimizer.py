@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+import datasource
+from backtest import run_backtest
+from benchmarks.synthetic import synthetic_daily
+from indicators import clean_daily, compute_weekly, to_weekly
+from optimizer import DEFAULT_PARAMS, main, sweep
+
+# --------------------------------------------------------------------------
+# 기본 그리드의 DEFAULT_PARAMS 조합 == run_backtest (기본 전략)
+# --------------------------------------------------------------------------
+@pytest.mark.parametrize('revised', [False, True])
+@pytest.mark.parametrize('seed', range(3))
+def test_default_params_row_matches_run_backtest(seed, revised):
+    df = synthetic_daily(n_years=6, seed=seed)
+    result = sweep(to_weekly(clean_daily(df)), revised=revised, workers=1)
+    row = result[(result['ma_window'] == DEFAULT_PARAMS['ma_window'])
+                 & (result['cmf_window'] == DEFAULT_PARAMS['cmf_window'])
+                 & (result['position_window'] == DEFAULT_PARAMS['position_window'])
+                 & np.isinf(result['fg_buy_max'])]
+    assert len(row) == 1
+    expected = run_backtest(compute_weekly(df), revised)[1]
+    for key, value in expected.items():
+        assert row[key].iloc[0] == pytest.approx(value, rel=1e-12, abs=1e-15), key
+
+
+def test_cli_prints_top_combinations(monkeypatch, capsys):
+    df = synthetic_daily(n_years=4, seed=0)
+    monkeypatch.setattr(datasource, 'default_source', lambda: lambda code, start=None, end=None: df)
+    assert main(['000000', '--top', '3', '--workers', '1']) == 0
+    assert len(capsys.readouterr().out.strip().splitlines()) == 4  # 머리글 + 상위 3개
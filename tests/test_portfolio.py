@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import datasource
+from backtest import run_backtest
+from benchmarks.synthetic import synthetic_daily
+from compact import write_universe
+from indicators import compute_weekly
+from portfolio import WEIGHTINGS, align_universe, align_weekly, main, run_portfolio
+
+# --------------------------------------------------------------------------
+# 종목 하나 / 자리 하나 포트폴리오 == run_backtest(revised=True)
+# --------------------------------------------------------------------------
+@pytest.mark.parametrize('weighting', ['equal', 'fear_greed'])
+@pytest.mark.parametrize('seed', range(5))
+def test_single_ticker_single_slot_matches_run_backtest(seed, weighting):
+    weekly = compute_weekly(synthetic_daily(n_years=5, seed=seed))
+    curve, weights, summary = run_portfolio({'000000': weekly}, max_positions=1, weighting=weighting)
+    expected = run_backtest(weekly, revised=True)[1]
+    assert summary['total_entries'] == expected['total_trades'] > 0
+    assert summary['cum_return'] == pytest.approx(expected['cum_return'], rel=1e-9, abs=1e-12)
+    assert weights['000000'].isin([0.0, 1.0]).all()
+
+
+# --------------------------------------------------------------------------
+# 명령줄: 종목명/종목코드 → 요약 출력 + 주별 곡선 CSV
+# --------------------------------------------------------------------------
+class StubSource:
+    def __init__(self, frames):
+        self.frames = frames
+
+    def __call__(self, code, start=None, end=None):
+        df = self.frames[code]
+        return df[(df.index >= pd.Timestamp(start)) & (df.index <= pd.Timestamp(end))]
+
+    def listing(self, market=None):
+        return pd.DataFrame({'Code': list(self.frames), 'Name': [f'종목{code}' for code in self.frames]})
+
+
+def test_cli_writes_curve(tmp_path, monkeypatch, capsys):
+    frames = {f'{seed:06d}': synthetic_daily(n_years=4, seed=seed, start='2018-01-02') for seed in range(3)}
+    monkeypatch.setattr(datasource, 'default_source', lambda: StubSource(frames))
+    out = tmp_path / 'curve.csv'
+    assert main(['--tickers', '000000', '종목000001', '000002', '--start', '2018-01-02', '--end', '2021-12-31',
+                 '--max-positions', '2', '--out', str(out)]) == 0
+    curve = pd.read_csv(out, index_col=0)
+    assert curve['Positions'].max() <= 2
+    assert 'cum_return' in capsys.readouterr().out
+
+
+# --------------------------------------------------------------------------
+# 압축 주봉(compact)에서 바로 만든 행렬 == 종목별 주봉으로 만든 행렬
+# --------------------------------------------------------------------------
+@pytest.fixture
+def universe(tmp_path):
+    # 시작/끝이 서로 다른 종목들 (날짜축 합집합 + 빈 주 처리 확인)
+    weeklies = {f'{seed:06d}': compute_weekly(synthetic_daily(n_years=3 + seed, seed=seed)).iloc[seed * 5:]
+                for seed in range(4)}
+    return write_universe(str(tmp_path / 'universe'), weeklies.items())
+
+
+def test_align_universe_matches_align_weekly(universe):
+    compact = align_universe(universe)
+    frames = align_weekly({code: universe.frame(code) for code in universe.codes})
+    assert compact['dates'].equals(frames['dates']) and compact['codes'] == frames['codes']
+    for key in ['available', 'open', 'buy', 'sell', 'fear_greed']:
+        np.testing.assert_array_equal(compact[key], frames[key])
+    for weighting in WEIGHTINGS:
+        expected = run_portfolio(frames, max_positions=2, weighting=weighting)
+        result = run_portfolio(compact, max_positions=2, weighting=weighting)
+        pd.testing.assert_frame_equal(result[0], expected[0])
+        assert result[2] == expected[2]
+
+
+def test_cli_reads_universe(universe, tmp_path, capsys):
+    out = tmp_path / 'curve.csv'
+    assert main(['--universe', universe.root, '--max-positions', '2', '--out', str(out)]) == 0
+    assert len(pd.read_csv(out)) == len(align_universe(universe)['dates'])
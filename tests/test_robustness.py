@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from backtest import run_backtest
+from benchmarks.synthetic import synthetic_daily
+from indicators import compute_weekly
+from robustness import strategy_weekly_returns
+
+# --------------------------------------------------------------------------
+# 주별 전략 수익률을 거래 구간마다 곱하면 run_backtest 의 거래 수익률
+# --------------------------------------------------------------------------
+@pytest.mark.parametrize('revised', [False, True])
+@pytest.mark.parametrize('seed', range(5))
+def test_weekly_returns_compound_to_trade_returns(seed, revised):
+    weekly = compute_weekly(synthetic_daily(n_years=5, seed=seed))
+    returns = strategy_weekly_returns(weekly, revised)
+    bt_df, summary, _ = run_backtest(weekly, revised)
+    assert len(bt_df) > 0
+    dates = returns.index
+    for trade in bt_df.itertuples():
+        # 기존 방식은 청산 봉 종가까지, 수정된 방식은 청산 봉 시가(그 주 수익률 제외)까지 보유
+        held = (dates >= trade.EntryDate) & ((dates <= trade.ExitDate) if not revised else (dates < trade.ExitDate))
+        assert np.prod(1 + returns[held]) == pytest.approx(1 + trade.Return, rel=1e-12)
+    # 거래 밖의 주는 0 이므로 전체 곱 == 누적 수익률
+    assert np.prod(1 + returns) == pytest.approx(1 + summary['cum_return'], rel=1e-12)
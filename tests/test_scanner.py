@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+
+import scanner
+from benchmarks.synthetic import synthetic_daily
+from indicators import OHLCV_COLUMNS
+from scanner import CALENDAR_CODE, scan_frame, scan_market
+from store import OHLCVStore, market_today
+
+# --------------------------------------------------------------------------
+# 당일 봉 = 종목 목록의 시세 스냅샷, 이력 = 저장소 (빠진 구간만 다운로드)
+# --------------------------------------------------------------------------
+CODES = [CALENDAR_CODE, '000010', '000020', '000030']
+
+
+def recent_daily(seed):
+    # 오늘(market_today)로 끝나는 평일 일봉
+    df = synthetic_daily(n_years=3, seed=seed, holiday_rate=0, zero_rate=0, nan_rate=0).iloc[-600:]
+    return df.set_axis(pd.bdate_range(end=market_today(), periods=600, name='Date'))
+
+
+class RecordingReader:
+    def __init__(self, frames):
+        self.frames = frames
+        self.calls = []
+
+    def __call__(self, code, start=None, end=None):
+        self.calls.append(code)
+        df = self.frames[code]
+        return df[(df.index >= pd.Timestamp(start)) & (df.index <= pd.Timestamp(end))]
+
+
+@pytest.fixture
+def frames():
+    return {code: recent_daily(seed) for seed, code in enumerate(CODES)}
+
+
+@pytest.fixture
+def listing(frames):
+    # fdr.StockListing('KRX') 처럼 종목별 당일 시세가 들어 있는 목록
+    rows = [{'Code': code, 'Name': f'종목{code}', **df[OHLCV_COLUMNS].iloc[-1].to_dict()} for code, df in frames.items()]
+    return pd.DataFrame(rows)
+
+
+def test_snapshot_bar_matches_full_history(tmp_path, frames, listing):
+    reader = RecordingReader(frames)
+    scan_df, failed = scan_market(listing, workers=1, loader=OHLCVStore(root=str(tmp_path), reader=reader))
+    assert failed == []
+    expected = pd.DataFrame([scan_frame(code, frames[code]) for code in scan_df['Code']])
+    pd.testing.assert_frame_equal(scan_df.drop(columns=['Name', 'Market']), expected, check_dtype=False)
+
+
+def test_warm_store_downloads_no_ticker_history(tmp_path, frames, listing):
+    reader = RecordingReader(frames)
+    ohlcv_store = OHLCVStore(root=str(tmp_path), reader=reader)
+    first, _ = scan_market(listing, workers=1, loader=ohlcv_store)
+    reader.calls.clear()
+    second, _ = scan_market(listing, workers=1, loader=ohlcv_store)
+    # 두 번째 스캔은 (필요하면) 거래일 확인용 기준 종목만 다시 받는다
+    assert set(reader.calls) <= {CALENDAR_CODE}
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_closed_session_is_recorded_in_store(tmp_path, frames, listing, monkeypatch):
+    # 장 마감 후 스캔은 스냅샷을 그 거래일의 확정 봉으로 저장소에 남긴다
+    monkeypatch.setattr(scanner, 'session_closed', lambda session, now=None: True)
+    ohlcv_store = OHLCVStore(root=str(tmp_path), reader=RecordingReader(frames))
+    scan_market(listing, workers=1, loader=ohlcv_store)
+    for code in CODES[1:]:
+        stored = ohlcv_store.read(code)
+        assert stored.index[-1].date() == market_today()
+        assert stored.iloc[-1].tolist() == frames[code][OHLCV_COLUMNS].iloc[-1].tolist()
+
+
+def test_listing_without_prices_reads_full_history(tmp_path, frames, listing):
+    reader = RecordingReader(frames)
+    scan_df, failed = scan_market(listing[['Code', 'Name']], workers=1,
+                                  loader=OHLCVStore(root=str(tmp_path), reader=reader))
+    assert failed == [] and len(scan_df) == len(CODES)
+    assert sorted(reader.calls) == sorted(CODES)
@@ -0,0 +1,97 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import store
+from benchmarks.synthetic import synthetic_daily
+from store import OHLCVStore
+
+# --------------------------------------------------------------------------
+# 증분 동기화: 저장소 결과 == 원본 구간, 빠진 구간만 다시 받는지 확인
+# --------------------------------------------------------------------------
+CODE = '000001'
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+DAILY = synthetic_daily(n_years=3, seed=7, start='2019-01-02')
+
+
+class RecordingReader:
+    # fdr.DataReader 대체: 요청 구간 (start, end) 를 기록하고 그 구간의 일봉을 돌려준다
+    def __init__(self, df):
+        self.df = df
+        self.calls = []
+
+    def __call__(self, code, start=None, end=None):
+        start, end = pd.Timestamp(start).date(), pd.Timestamp(end).date()
+        self.calls.append((start, end))
+        return self.df[(self.df.index >= pd.Timestamp(start)) & (self.df.index <= pd.Timestamp(end))]
+
+
+def expected(start, end):
+    df = DAILY[COLUMNS].dropna()  # 저장소는 결측 행을 저장하지 않는다
+    df.index = df.index.astype('datetime64[ns]')
+    return df[(df.index >= pd.Timestamp(start)) & (df.index <= pd.Timestamp(end))]
+
+
+def last_trading_day(end):
+    return DAILY.index[DAILY.index <= pd.Timestamp(end)][-1].date()
+
+
+@pytest.fixture
+def reader():
+    return RecordingReader(DAILY)
+
+
+@pytest.fixture
+def ohlcv_store(tmp_path, reader):
+    return OHLCVStore(root=str(tmp_path), reader=reader)
+
+
+def assert_loaded(ohlcv_store, start, end):
+    pd.testing.assert_frame_equal(ohlcv_store.load(CODE, start, end), expected(start, end), check_freq=False)
+
+
+def test_initial_load(ohlcv_store, reader):
+    assert_loaded(ohlcv_store, date(2020, 3, 2), date(2020, 6, 30))
+    assert reader.calls == [(date(2020, 3, 2), date(2020, 6, 30))]
+    # 저장된 구간 안쪽 요청은 다시 받지 않는다
+    assert_loaded(ohlcv_store, date(2020, 4, 1), date(2020, 5, 29))
+    assert len(reader.calls) == 1
+
+
+def test_earlier_start_fetches_only_head(ohlcv_store, reader):
+    ohlcv_store.load(CODE, date(2020, 3, 2), date(2020, 6, 30))
+    assert_loaded(ohlcv_store, date(2020, 1, 6), date(2020, 6, 30))
+    assert reader.calls[1:] == [(date(2020, 1, 6), date(2020, 3, 1))]
+
+
+def test_later_end_fetches_only_tail(ohlcv_store, reader):
+    ohlcv_store.load(CODE, date(2020, 3, 2), date(2020, 6, 30))
+    assert_loaded(ohlcv_store, date(2020, 3, 2), date(2020, 9, 30))
+    # 마지막 저장일(미완성 봉일 수 있음)부터 다시 받는다
+    assert reader.calls[1:] == [(last_trading_day(date(2020, 6, 30)), date(2020, 9, 30))]
+
+
+def test_earlier_start_and_later_end(ohlcv_store, reader):
+    ohlcv_store.load(CODE, date(2020, 3, 2), date(2020, 6, 30))
+    assert_loaded(ohlcv_store, date(2020, 1, 6), date(2020, 9, 30))
+    assert reader.calls[1:] == [(date(2020, 1, 6), date(2020, 3, 1)),
+                                (last_trading_day(date(2020, 6, 30)), date(2020, 9, 30))]
+
+
+def test_range_entirely_before_stored_start(ohlcv_store, reader):
+    ohlcv_store.load(CODE, date(2020, 3, 2), date(2020, 6, 30))
+    assert_loaded(ohlcv_store, date(2019, 6, 3), date(2019, 9, 30))
+    assert reader.calls[1:] == [(date(2019, 6, 3), date(2020, 3, 1))]
+    # 사이 구간과 기존 기록이 모두 남아 있다
+    pd.testing.assert_frame_equal(ohlcv_store.read(CODE), expected(date(2019, 6, 3), date(2020, 6, 30)),
+                                  check_freq=False)
+
+
+def test_stale_today_refetches_tail(tmp_path, reader, monkeypatch):
+    # 종료일이 오늘이고 재동기화 주기가 지났으면 같은 요청도 꼬리를 다시 받는다
+    monkeypatch.setattr(store, 'market_today', lambda now=None: date(2020, 6, 30))
+    ohlcv_store = OHLCVStore(root=str(tmp_path), reader=reader, refresh_seconds=0)
+    ohlcv_store.load(CODE, date(2020, 3, 2), date(2020, 6, 30))
+    assert_loaded(ohlcv_store, date(2020, 3, 2), date(2020, 6, 30))
+    assert reader.calls[1:] == [(last_trading_day(date(2020, 6, 30)), date(2020, 6, 30))]
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import synthetic_daily
+from indicators import OHLCV_COLUMNS, compute_weekly
+from streaming import IncrementalIndicators
+
+# --------------------------------------------------------------------------
+# 증분 지표 == pandas 일괄 계산 (부동소수점 오차 범위)
+# --------------------------------------------------------------------------
+RTOL = 1e-9
+ATOL = 1e-9
+FLOAT_COLUMNS = ['Prev_High', 'Prev_Low', 'MA10', 'CMF', 'Momentum5', 'Position52W', 'VolumeSurge',
+                 'VolatilitySpike', 'FearGreedScore']
+SIGNAL_COLUMNS = ['BuySignal', 'SellSignal']
+
+
+def assert_row_close(row, expected):
+    assert row['Date'] == expected.name
+    for col in OHLCV_COLUMNS + FLOAT_COLUMNS:
+        np.testing.assert_allclose(row[col], expected[col], rtol=RTOL, atol=ATOL, err_msg=col)
+    for col in SIGNAL_COLUMNS:
+        assert row[col] == expected[col], col
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_weekly_updates_match_batch(seed):
+    # 완성된 주봉을 하나씩 넣을 때 매 주의 결과가 compute_weekly 의 같은 행과 일치
+    weekly = compute_weekly(synthetic_daily(n_years=3, seed=seed))
+    state = IncrementalIndicators()
+    for day, bar in weekly[OHLCV_COLUMNS].iterrows():
+        row = state.update_weekly(day, *bar)
+        assert_row_close(row, weekly.loc[day])
+    assert_row_close(IncrementalIndicators.from_weekly(weekly).current(), weekly.iloc[-1])
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_from_daily_matches_batch(seed):
+    df = synthetic_daily(n_years=3, seed=seed, zero_rate=0.01, nan_rate=0.01)
+    assert_row_close(IncrementalIndicators.from_daily(df).current(), compute_weekly(df).iloc[-1])
+
+
+@pytest.mark.parametrize('seed', range(2))
+def test_provisional_midweek_values(seed):
+    # 주 중간의 잠정값 == 그날까지의 일봉으로 다시 계산한 compute_weekly 의 마지막 행
+    df = synthetic_daily(n_years=2, seed=seed, zero_rate=0.01, nan_rate=0.01)
+    split = len(df) - 40
+    state = IncrementalIndicators.from_daily(df.iloc[:split])
+    for i in range(split, len(df)):
+        day = df.index[i]
+        o, h, l, c, v = df.iloc[i][OHLCV_COLUMNS]
+        row = state.update_daily(day, o, h, l, c, v)
+        assert_row_close(row, compute_weekly(df.iloc[:i + 1]).iloc[-1])
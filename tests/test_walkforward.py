@@ -0,0 +1,38 @@
+import pytest
+
+from backtest import run_backtest
+from benchmarks.synthetic import synthetic_daily
+from indicators import compute_weekly
+from walkforward import make_windows, walk_forward
+
+# --------------------------------------------------------------------------
+# 구간별 결과 == 그 구간만 잘라서 돌린 run_backtest
+# --------------------------------------------------------------------------
+TRAIN_WEEKS, TEST_WEEKS, STEP_WEEKS = 52, 13, 5
+
+
+def weekly_for(seed):
+    return compute_weekly(synthetic_daily(n_years=6, seed=seed))
+
+
+@pytest.mark.parametrize('expanding', [False, True])
+@pytest.mark.parametrize('revised', [False, True])
+@pytest.mark.parametrize('seed', range(3))
+def test_windows_match_run_backtest_on_slice(seed, revised, expanding):
+    weekly = weekly_for(seed)
+    result = walk_forward(weekly, TRAIN_WEEKS, TEST_WEEKS, STEP_WEEKS, expanding=expanding, revised=revised,
+                          workers=1)
+    train_start, test_start, test_end = make_windows(len(weekly), TRAIN_WEEKS, TEST_WEEKS, STEP_WEEKS, expanding)
+    assert len(result) == len(test_start) > 0
+    for i in range(len(result)):
+        for prefix, lo, hi in (('train', train_start[i], test_start[i]), ('test', test_start[i], test_end[i])):
+            expected = run_backtest(weekly.iloc[lo:hi], revised)[1]
+            for key, value in expected.items():
+                assert result[f'{prefix}_{key}'].iloc[i] == pytest.approx(value, rel=1e-12, abs=1e-15), (i, prefix, key)
+
+
+def test_process_pool_matches_single_process():
+    weekly = weekly_for(0)
+    single = walk_forward(weekly, TRAIN_WEEKS, TEST_WEEKS, step_weeks=1, workers=1)
+    pooled = walk_forward(weekly, TRAIN_WEEKS, TEST_WEEKS, step_weeks=1, workers=2, chunk_size=16)
+    assert single.equals(pooled)
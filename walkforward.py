@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+from backtest import signal_triggers, resolve_positions, batch_trade_returns, batch_summary, evaluate_chunks
+
+# --------------------------------------------------------------------------
+# 🔁 워크포워드 / 롤링 구간 백테스트
+# --------------------------------------------------------------------------
+# 한 번의 시작일로 얻은 수익률 하나 대신, 주봉 이력을 여러 (학습, 검증) 구간으로 나눠
+# 구간마다 백테스트를 돌리고 그 분포를 본다.
+#  - rolling: 학습 구간 길이 고정, step 만큼 밀며 이동
+#  - expanding: 학습 구간 시작을 처음에 고정하고 끝만 늘림
+# 지표(신호)는 전체 이력으로 한 번만 계산하고, 구간은 (구간 × 주) 2차원 배열로 잘라
+# 한 번에 평가한다. 각 구간은 그 구간만 잘라 run_backtest 를 돌린 것과 같은 결과다
+# (구간 시작 시 미보유, 첫 봉 무시, 구간 마지막 봉에서 강제 청산).
+# 구간 묶음은 프로세스 풀로 나누어 평가한다.
+DEFAULT_TRAIN_WEEKS = 104
+DEFAULT_TEST_WEEKS = 26
+CHUNK_SIZE = 500
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+
+def make_windows(n_weeks, train_weeks=DEFAULT_TRAIN_WEEKS, test_weeks=DEFAULT_TEST_WEEKS, step_weeks=None,
+                 expanding=False):
+    # 반환: (train_start, test_start, test_end) 인덱스 배열 (test_end 는 미포함)
+    # train_weeks=0 이면 학습 구간 없이 검증 구간만 굴리는 롤링 백테스트가 된다
+    step_weeks = step_weeks or test_weeks
+    test_start = np.arange(train_weeks, n_weeks - test_weeks + 1, step_weeks)
+    train_start = np.zeros_like(test_start) if expanding else test_start - train_weeks
+    return train_start, test_start, test_start + test_weeks
+
+
+def _segment_context(weekly, revised):
+    return {
+        'buy': weekly['BuySignal'].to_numpy() == 1,
+        'sell': weekly['SellSignal'].to_numpy() == 1,
+        'open': weekly['Open'].to_numpy(dtype='f8'),
+        'close': weekly['Close'].to_numpy(dtype='f8'),
+        'revised': revised,
+    }
+
+
+def _evaluate_segments(ctx, starts, ends):
+    # [start, end) 구간들을 한 번에 백테스트 → batch_summary 배열
+    lengths = ends - starts
+    idx = starts[:, None] + np.arange(lengths.max())
+    valid = idx < ends[:, None]
+    idx = np.minimum(idx, len(ctx['buy']) - 1)
+    buy, sell = signal_triggers(ctx['buy'][idx] & valid, ctx['sell'][idx] & valid, ctx['revised'])
+    position = resolve_positions(buy, sell)
+    exit_price = ctx['open'] if ctx['revised'] else ctx['close']
+    rows, returns = batch_trade_returns(position, ctx['open'][idx], exit_price[idx], lengths=lengths)
+    return batch_summary(rows, returns, len(starts))
+
+
+def evaluate_segments(weekly, starts, ends, revised=True, workers=None, chunk_size=CHUNK_SIZE):
+    # weekly: 신호가 계산된 주봉 (indicators.compute_weekly 결과)
+    starts = np.asarray(starts, dtype=np.intp)
+    ends = np.asarray(ends, dtype=np.intp)
+    keys = ['total_trades', 'avg_return', 'cum_return', 'win_rate']
+    if len(starts) == 0:
+        return {key: np.zeros(0) for key in keys}
+    ctx = _segment_context(weekly, revised)
+    chunks = [(starts[i:i + chunk_size], ends[i:i + chunk_size]) for i in range(0, len(starts), chunk_size)]
+    results = evaluate_chunks(_evaluate_segments, ctx, chunks, workers)
+    return {key: np.concatenate([r[key] for r in results]) for key in keys}
+
+
+def walk_forward(weekly, train_weeks=DEFAULT_TRAIN_WEEKS, test_weeks=DEFAULT_TEST_WEEKS, step_weeks=None,
+                 expanding=False, revised=True, workers=None, chunk_size=CHUNK_SIZE):
+    # 반환: 구간별 학습/검증 구간 날짜와 각 구간의 total_trades / avg_return / cum_return / win_rate
+    train_start, test_start, test_end = make_windows(len(weekly), train_weeks, test_weeks, step_weeks, expanding)
+    dates = weekly.index
+    result = pd.DataFrame({
+        'TrainStart': dates[train_start] if train_weeks else pd.NaT,
+        'TestStart': dates[test_start],
+        'TestEnd': dates[test_end - 1],
+    })
+    if train_weeks:
+        train = evaluate_segments(weekly, train_start, test_start, revised, workers, chunk_size)
+        for key, values in train.items():
+            result[f'train_{key}'] = values
+    test = evaluate_segments(weekly, test_start, test_end, revised, workers, chunk_size)
+    for key, values in test.items():
+        result[f'test_{key}'] = values
+    return result
+
+
+def window_distribution(result, prefix='test'):
+    # 구간별 누적 수익률 / 승률의 분포 요약 (승률은 거래가 있었던 구간만)
+    cum = result[f'{prefix}_cum_return']
+    traded = result[f'{prefix}_total_trades'] > 0
+    win = result.loc[traded, f'{prefix}_win_rate']
+    rows = {}
+    for name, values in (('cum_return', cum), ('win_rate', win)):
+        stats = {'mean': values.mean(), 'std': values.std()}
+        stats.update({f'q{int(q * 100):02d}': values.quantile(q) for q in QUANTILES})
+        rows[name] = stats
+    summary = pd.DataFrame(rows).T
+    summary['windows'] = [len(cum), int(traded.sum())]
+    summary['positive_share'] = [(cum > 0).mean(), (win > 0.5).mean()]  # 수익 > 0 / 승률 > 50% 인 구간 비율
+    return summary